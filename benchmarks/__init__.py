@@ -0,0 +1,7 @@
+"""
+Performance benchmarks for the store.
+
+Each module is runnable from the repository root, e.g.
+`python -m benchmarks.bench_startup`, and exits with a non-zero status
+when its measurements exceed the configured budget.
+"""
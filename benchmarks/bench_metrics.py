@@ -0,0 +1,85 @@
+"""
+Overhead benchmark for the metrics instrumentation.
+
+Checks that every timed method is the plain, unwrapped function while metrics
+are disabled, so disabled timing hooks cost nothing, and measures a typical
+three-line Store.order with metrics disabled and enabled, in interleaved
+rounds taking the best time of each. Fails when a disabled method is still
+wrapped or the enabled overhead is over its budget.
+
+Such an order makes six timed calls (the order, three buys and two promotion
+prices, each two clock reads and a list append) and five counter updates.
+Measured at +41% to +52% on x86_64 with Python 3.11, and about half of that
+is the clock reads alone; the 60% budget leaves room for noise while still
+catching a hook that costs as much as the timed calls did before batching
+(+57% to +96%).
+
+Usage: python -m benchmarks.bench_metrics [--order-budget-pct 60] [--rounds 15]
+"""
+
+
+import argparse
+import sys
+import timeit
+import metrics
+import promotions
+from products import Product, NonStockedProduct, LimitedProduct
+from store import Store
+
+
+BUDGET_PCT = 60.0
+
+
+def make_order():
+    """Return a store and a three-line order that can be placed many times."""
+    mac = Product("MacBook Air M2", price=1450, quantity=10 ** 9)
+    mac.set_promotion(promotions.SecondHalfPrice())
+    windows = NonStockedProduct("Windows License", price=125)
+    windows.set_promotion(promotions.PercentDiscount(30))
+    shipping = LimitedProduct("Shipping", price=10, quantity=10 ** 9, maximum=1)
+    return Store([mac, windows, shipping]), [(mac, 2), (windows, 1), (shipping, 1)]
+
+
+def unwrapped_methods():
+    """Return (number of timed methods, number of them that are the plain function)."""
+    # pylint: disable=protected-access
+    plain = sum(getattr(owner, attribute) is func
+                for owner, attribute, func, *_ in metrics._timed_methods)
+    return len(metrics._timed_methods), plain
+
+
+def main(argv=None):
+    """Measure the instrumentation overhead and return 1 if it is over budget."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--order-budget-pct", type=float, default=BUDGET_PCT)
+    parser.add_argument("--number", type=int, default=5000)
+    parser.add_argument("--rounds", type=int, default=15)
+    args = parser.parse_args(argv)
+
+    metrics.disable()
+    timed_count, plain_count = unwrapped_methods()
+
+    best_buy, order_list = make_order()
+    place = lambda: best_buy.order(order_list)  # pylint: disable=unnecessary-lambda-assignment
+    disabled = enabled = float("inf")
+    # interleaved rounds, so that both sides see the same machine load
+    for _ in range(args.rounds):
+        disabled = min(disabled, timeit.timeit(place, number=args.number) / args.number)
+        metrics.enable()
+        enabled = min(enabled, timeit.timeit(place, number=args.number) / args.number)
+        metrics.disable()
+    metrics.reset()
+    order_pct = (enabled - disabled) / disabled * 100
+
+    print(f"disabled hooks: {plain_count} of {timed_count} timed methods are unwrapped")
+    print(f"Store.order: {disabled * 1e6:.2f} us disabled, {enabled * 1e6:.2f} us enabled, "
+          f"+{order_pct:.1f}% (budget {args.order_budget_pct:.0f}%)")
+    if plain_count != timed_count or order_pct > args.order_budget_pct:
+        print("FAIL: instrumentation overhead is over budget")
+        return 1
+    print("OK")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,90 @@
+"""
+Memory benchmark for interned product and promotion names.
+
+Builds a catalog of products whose names repeat a limited set of variants
+(every name is built at runtime, as when read from a file, so equal names
+start out as separate strings) and measures with tracemalloc:
+    - the name strings alone, kept as built versus interned,
+    - the whole catalog with its names kept as built (as products did before
+      names were interned) versus interned, and how many distinct name
+      objects each holds.
+
+Usage: python -m benchmarks.bench_names [--size 1000000] [--variants 1000]
+"""
+
+
+import argparse
+import sys
+import tracemalloc
+import promotions
+from products import Product
+
+
+COLORS = ("Black", "White", "Silver", "Blue", "Red")
+
+
+def make_names(size, variants):
+    """Return size names built at runtime from variants distinct names."""
+    return [f"Model {index % variants // len(COLORS)} {COLORS[index % len(COLORS)]}"
+            for index in range(size)]
+
+
+def traced(func):
+    """Return (result of func(), bytes it left allocated)."""
+    tracemalloc.start()
+    try:
+        result = func()
+        return result, tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+
+
+def main(argv=None):
+    """Print the memory used by names kept as built and interned, and by the catalog."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--size", type=int, default=1000000)
+    parser.add_argument("--variants", type=int, default=1000)
+    args = parser.parse_args(argv)
+
+    _, plain = traced(lambda: make_names(args.size, args.variants))
+    _, interned = traced(lambda: [sys.intern(name)
+                                  for name in make_names(args.size, args.variants)])
+    print(f"{args.size} names of {args.variants} variants: {plain / 2 ** 20:.1f} MiB as built, "
+          f"{interned / 2 ** 20:.1f} MiB interned ({1 - interned / plain:.0%} saved)")
+
+    def build_catalog(intern_names):
+        discounts = [promotions.PercentDiscount(10 * (index % 5 + 1))
+                     for index in range(args.size // 100)]
+        catalog = []
+        for index, name in enumerate(make_names(args.size, args.variants)):
+            prod = Product(name, price=10, quantity=1)
+            if not intern_names:
+                # keep the name as built, undoing the interning of Product
+                prod._name = name  # pylint: disable=protected-access
+            if index % 100 == 0:
+                prod.set_promotion(discounts[index // 100])
+            catalog.append(prod)
+        if not intern_names:
+            for discount in discounts:
+                name = f"{discount.get_percent()}% off!"
+                discount._name = name  # pylint: disable=protected-access
+        return catalog, discounts
+
+    results = {}
+    for intern_names in (False, True):
+        (catalog, discounts), catalog_bytes = traced(lambda: build_catalog(intern_names))
+        results[intern_names] = catalog_bytes
+        names = {id(prod.get_name()) for prod in catalog}
+        promotion_names = {id(promotion.get_name()) for promotion in discounts}
+        print(f"catalog of {len(catalog)} products, names "
+              f"{'interned' if intern_names else 'as built'}: {catalog_bytes / 2 ** 20:.1f} MiB, "
+              f"{len(names)} distinct product name objects, "
+              f"{len(promotion_names)} distinct names over {len(discounts)} discounts")
+        del catalog, discounts
+    print(f"catalog saved by interning: {(results[False] - results[True]) / 2 ** 20:.1f} MiB "
+          f"({1 - results[True] / results[False]:.0%})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
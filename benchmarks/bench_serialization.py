@@ -0,0 +1,59 @@
+"""
+Benchmark of the packed product serialization against pickle.
+
+Serializes the product list of a synthetic store with pickle and with
+serialization.dumps(), and reports the size, the time to dump, the time to
+load the product list back and, for the packed format, the time to map the columns
+without rebuilding any product (what a worker reading the shared columns
+pays).
+
+Usage: python -m benchmarks.bench_serialization [--size 100000]
+"""
+
+
+import argparse
+import pickle
+import sys
+import time
+import serialization
+from benchmarks.bench_store import make_catalog
+from store import Store
+
+
+def timed(func):
+    """Return (result of func(), seconds it took)."""
+    start = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - start
+
+
+def main(argv=None):
+    """Print the size and timings of pickle and the packed format."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--size", type=int, default=100000)
+    args = parser.parse_args(argv)
+
+    best_buy = Store(make_catalog(args.size))
+    list_of_products = best_buy.get_list_of_products()
+
+    pickled, pickle_dump = timed(lambda: pickle.dumps(list_of_products,
+                                                      pickle.HIGHEST_PROTOCOL))
+    _, pickle_load = timed(lambda: pickle.loads(pickled))
+    packed, packed_dump = timed(lambda: serialization.dumps(best_buy))
+    catalog, packed_map = timed(lambda: serialization.PackedCatalog(packed))
+    _, packed_load = timed(catalog.to_products)
+    catalog.close()
+    _, store_load = timed(lambda: serialization.loads(packed))
+
+    print(f"{args.size} products")
+    print(f"{'format':10}{'size MiB':>10}{'dump ms':>10}{'load ms':>10}{'map ms':>10}")
+    print(f"{'pickle':10}{len(pickled) / 2 ** 20:>10.2f}{pickle_dump * 1e3:>10.1f}"
+          f"{pickle_load * 1e3:>10.1f}{'-':>10}")
+    print(f"{'packed':10}{len(packed) / 2 ** 20:>10.2f}{packed_dump * 1e3:>10.1f}"
+          f"{packed_load * 1e3:>10.1f}{packed_map * 1e3:>10.3f}")
+    print(f"packed into a new Store (serialization.loads): {store_load * 1e3:.1f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
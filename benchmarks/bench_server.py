@@ -0,0 +1,110 @@
+"""
+Load generator for the HTTP/JSON store service.
+
+Starts the service on a free localhost port over a synthetic catalog and runs
+client threads that each keep one connection alive and send a mix of total,
+quote and batched order requests (and, every so often, a full listing). Reports
+requests per second and the p50/p99 latencies per endpoint, and fails when the
+overall p99 latency is over budget.
+
+Usage: python -m benchmarks.bench_server [--clients 8] [--requests 2000] [--p99-budget-ms 50]
+"""
+
+
+import argparse
+import http.client
+import json
+import random
+import sys
+import threading
+import time
+from benchmarks.bench_store import make_catalog
+from server import make_server
+from store import Store
+
+
+def percentile(latencies, fraction):
+    """Return the latency at the given fraction of the sorted latencies."""
+    ordered = sorted(latencies)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def make_requests(product_ids, count, seed, batch_size=4, listing_every=200):
+    """Return a deterministic list of (endpoint, method, path, body) requests."""
+    rand = random.Random(seed)
+    requests = []
+    for index in range(count):
+        lines = [{"id": rand.choice(product_ids), "quantity": rand.randint(1, 3)}
+                 for _ in range(rand.randint(1, 3))]
+        if index % listing_every == listing_every - 1:
+            requests.append(("list", "GET", "/products", None))
+        elif index % 3 == 0:
+            requests.append(("total", "GET", "/total", None))
+        elif index % 3 == 1:
+            requests.append(("quote", "POST", "/quote", json.dumps({"lines": lines}).encode()))
+        else:
+            orders = [{"lines": lines} for _ in range(batch_size)]
+            requests.append(("order", "POST", "/order", json.dumps({"orders": orders}).encode()))
+    return requests
+
+
+def client(address, requests, latencies):
+    """Send the requests over one kept-alive connection, appending (endpoint, seconds)."""
+    connection = http.client.HTTPConnection(*address)
+    try:
+        for endpoint, method, path, body in requests:
+            start = time.perf_counter()
+            connection.request(method, path, body=body)
+            response = connection.getresponse()
+            response.read()
+            latencies.append((endpoint, time.perf_counter() - start))
+    finally:
+        connection.close()
+
+
+def main(argv=None):
+    """Run the load generator and return 1 if the p99 latency is over budget."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=2000, help="requests per client")
+    parser.add_argument("--catalog-size", type=int, default=1000)
+    parser.add_argument("--p99-budget-ms", type=float, default=50.0)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    catalog = make_catalog(args.catalog_size)
+    server = make_server(Store(catalog), port=0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    product_ids = [prod.get_id() for prod in catalog]
+    latencies = [[] for _ in range(args.clients)]
+    clients = [threading.Thread(target=client, args=(
+        server.server_address, make_requests(product_ids, args.requests, args.seed + index),
+        latencies[index])) for index in range(args.clients)]
+    start = time.perf_counter()
+    for thread in clients:
+        thread.start()
+    for thread in clients:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    server.shutdown()
+    server.server_close()
+
+    samples = [sample for client_samples in latencies for sample in client_samples]
+    print(f"{len(samples)} requests from {args.clients} clients in {elapsed:.2f} s: "
+          f"{len(samples) / elapsed:.0f} requests/s")
+    for endpoint in ("total", "quote", "order", "list"):
+        seconds = [duration for name, duration in samples if name == endpoint]
+        if seconds:
+            print(f"{endpoint:8}{len(seconds):>8} requests"
+                  f"  p50 {percentile(seconds, 0.5) * 1e3:7.2f} ms"
+                  f"  p99 {percentile(seconds, 0.99) * 1e3:7.2f} ms")
+    p99_ms = percentile([duration for _, duration in samples], 0.99) * 1e3
+    if p99_ms > args.p99_budget_ms:
+        print(f"FAIL: p99 latency {p99_ms:.2f} ms over budget {args.p99_budget_ms:.2f} ms")
+        return 1
+    print(f"OK: p99 latency {p99_ms:.2f} ms (budget {args.p99_budget_ms:.2f} ms)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,162 @@
+"""
+Benchmark suite for the store's hot paths.
+
+Covers product construction and validation, buy() per product type, each
+promotion's apply_promotion(), make_compact_order_list(), and Store.order(),
+get_all_products(), get_total_quantity() and, when NumPy is installed,
+get_inventory_report() at catalog sizes from 10^2 up to 10^6. Results are
+saved as JSON and compared against a stored baseline; the run fails when any
+case is slower than its baseline by more than the threshold. Everything runs
+offline on synthetic data.
+
+Usage:
+    python -m benchmarks.bench_store [--max-exponent 6] [--output results.json]
+    python -m benchmarks.bench_store --save-baseline
+"""
+
+
+import argparse
+import json
+import os
+import platform
+import sys
+import timeit
+import promotions
+from products import Product, NonStockedProduct, LimitedProduct
+from store import Store, make_compact_order_list
+
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+PLENTY = 10 ** 12
+
+
+def best_time(func, repeat=5, min_duration=0.05):
+    """Return the best time per call of func in seconds, timeit-style."""
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    number = max(1, int(number * min_duration / 0.2))
+    return min(timer.repeat(repeat=repeat, number=number)) / number
+
+
+def make_catalog(size):
+    """Return a synthetic catalog mixing all product types and promotions."""
+    catalog_promotions = [None, promotions.SecondHalfPrice(), promotions.ThirdOneFree(),
+                          promotions.PercentDiscount(30)]
+    catalog = []
+    for index in range(size):
+        if index % 10 == 0:
+            prod = NonStockedProduct(f"License {index}", price=25)
+        elif index % 10 == 1:
+            prod = LimitedProduct(f"Shipping {index}", price=10, quantity=PLENTY, maximum=PLENTY)
+        else:
+            prod = Product(f"Product {index}", price=index % 1000 + 1, quantity=PLENTY)
+        if catalog_promotions[index % 4] is not None:
+            prod.set_promotion(catalog_promotions[index % 4])
+        catalog.append(prod)
+    return catalog
+
+
+def product_cases():
+    """Yield (name, callable) pairs for the per-product and per-promotion cases."""
+    yield "construct/Product", lambda: Product("MacBook Air M2", price=1450, quantity=100)
+    yield "construct/NonStockedProduct", lambda: NonStockedProduct("Windows License", price=125)
+    yield "construct/LimitedProduct", lambda: LimitedProduct("Shipping", price=10,
+                                                             quantity=250, maximum=1)
+
+    mac = Product("MacBook Air M2", price=1450, quantity=PLENTY)
+    windows = NonStockedProduct("Windows License", price=125)
+    shipping = LimitedProduct("Shipping", price=10, quantity=PLENTY, maximum=PLENTY)
+    for prod in (mac, windows, shipping):
+        yield f"buy/{type(prod).__name__}", lambda prod=prod: prod.buy(3)
+
+    for promotion in (promotions.SecondHalfPrice(), promotions.ThirdOneFree(),
+                      promotions.PercentDiscount(30)):
+        yield (f"apply_promotion/{type(promotion).__name__}",
+               lambda promotion=promotion: promotion.apply_promotion(mac, 7))
+
+    shopping_list = [(f"item {index % 25}", index % 3 + 1) for index in range(100)]
+    yield "make_compact_order_list/100_lines", lambda: make_compact_order_list(shopping_list)
+
+
+def store_cases(size):
+    """Yield (name, callable) pairs for the store cases at the given catalog size."""
+    catalog = make_catalog(size)
+    best_buy = Store(catalog)
+    step = max(1, size // 5)
+    shopping_list = [(catalog[index], 1) for index in range(2, size, step)]
+    yield f"Store.order/{size}", lambda: best_buy.order(shopping_list)
+    yield f"Store.get_all_products/{size}", best_buy.get_all_products
+    yield f"Store.get_total_quantity/{size}", best_buy.get_total_quantity
+    try:
+        best_buy.get_inventory_report()
+    except ImportError:
+        return
+    yield f"Store.get_inventory_report/{size}", best_buy.get_inventory_report
+
+
+def run(max_exponent=6, verbose=True):
+    """Run every case and return a {case name: seconds per call} dict."""
+    def cases():
+        yield from product_cases()
+        for exponent in range(2, max_exponent + 1):
+            yield from store_cases(10 ** exponent)
+
+    results = {}
+    for name, func in cases():
+        results[name] = best_time(func)
+        if verbose:
+            print(f"{name:45} {results[name] * 1e6:12.2f} us")
+    return results
+
+
+def compare(results, baseline, threshold):
+    """Return (name, ratio) pairs of the cases slower than baseline by more than threshold."""
+    regressions = []
+    for name, seconds in results.items():
+        if name in baseline and seconds > baseline[name] * (1 + threshold):
+            regressions.append((name, seconds / baseline[name]))
+    return regressions
+
+
+def main(argv=None):
+    """Run the suite, save the results and return 1 on a regression against the baseline."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--max-exponent", type=int, default=6,
+                        help="largest catalog size as a power of ten (default 6)")
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true",
+                        help="store the results as the new baseline instead of comparing")
+    parser.add_argument("--threshold", type=float, default=0.5,
+                        help="allowed slowdown against the baseline (default 0.5 = 50%%)")
+    args = parser.parse_args(argv)
+
+    results = run(args.max_exponent)
+    report = {"python": platform.python_version(), "machine": platform.machine(),
+              "results": results}
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as output_file:
+            json.dump(report, output_file, indent=2, sort_keys=True)
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as baseline_file:
+            json.dump(report, baseline_file, indent=2, sort_keys=True)
+        print(f"Baseline saved to {args.baseline}")
+        return 0
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}, run with --save-baseline first")
+        return 0
+
+    with open(args.baseline, encoding="utf-8") as baseline_file:
+        baseline = json.load(baseline_file)["results"]
+    regressions = compare(results, baseline, args.threshold)
+    for name, ratio in regressions:
+        print(f"REGRESSION {name}: {ratio:.2f}x the baseline")
+    if regressions:
+        print(f"FAIL: {len(regressions)} case(s) regressed by more than {args.threshold:.0%}")
+        return 1
+    print("OK")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
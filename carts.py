@@ -0,0 +1,204 @@
+"""
+Open carts with incremental repricing.
+
+A CartPricer keeps the price of every line of its open carts and a dependency
+graph from promotions to the products that carry them, and from products to
+the carts that contain them. When the promotion or the price of a product
+changes (set_promotion(), remove_promotion(), set_price(), ...), only the
+lines of that product in the carts that contain it are repriced, and each
+cart total is patched by the difference, so the work is proportional to the
+affected lines rather than to all carts. Subscribers are told about every
+repriced cart.
+"""
+
+
+import itertools
+import products
+
+
+class Cart:
+    """Open cart of product lines, priced at the products' current prices and promotions."""
+
+    def __init__(self, pricer, cart_id):
+        """Initialize an empty cart; use CartPricer.open_cart() to create one."""
+        self._pricer = pricer
+        self._id = cart_id
+        self._products = {}
+        self._quantities = {}
+        self._prices = {}
+        self._total = 0.0
+        self._closed = False
+
+    def get_id(self):
+        """Return the ID of the cart."""
+        return self._id
+
+    def set_line(self, prod, quantity):
+        """Set the quantity of a product in the cart; 0 removes the line."""
+        if self._closed:
+            raise ValueError("Invalid cart, please provide an open cart")
+        if isinstance(quantity, bool) or not isinstance(quantity, int) or quantity < 0:
+            raise ValueError("Invalid quantity, please provide a real number, "
+                             "greater or equal to zero")
+        if not isinstance(prod, products.Product):
+            raise TypeError("Only Product instances can be added to a cart")
+        product_id = prod.get_id()
+        if quantity == 0:
+            if product_id in self._quantities:
+                del self._products[product_id]
+                del self._quantities[product_id]
+                self._total -= self._prices.pop(product_id)
+                if not self._prices:
+                    self._total = 0.0
+                self._pricer._untrack(self, prod)  # pylint: disable=protected-access
+            return
+        if product_id not in self._quantities:
+            self._pricer._track(self, prod)  # pylint: disable=protected-access
+        self._products[product_id] = prod
+        self._quantities[product_id] = quantity
+        self._reprice_line(prod)
+
+    def _reprice_line(self, prod):
+        """Price the product's line again and patch the total; return the previous total."""
+        previous_total = self._total
+        price = prod.get_quote(self._quantities[prod.get_id()])
+        self._total += price - self._prices.get(prod.get_id(), 0.0)
+        self._prices[prod.get_id()] = price
+        return previous_total
+
+    def get_quantity(self, prod):
+        """Return the quantity of the product in the cart."""
+        return self._quantities.get(prod.get_id(), 0)
+
+    def get_line_price(self, prod):
+        """Return the price of the product's line, or 0 if it is not in the cart."""
+        return self._prices.get(prod.get_id(), 0.0)
+
+    def get_total(self):
+        """Return the total price of the cart."""
+        return self._total
+
+    def get_shopping_list(self):
+        """Return the lines as a (Product, quantity) list, as taken by Store.order()."""
+        return [(self._products[product_id], quantity)
+                for product_id, quantity in self._quantities.items()]
+
+    def is_closed(self):
+        """Return True if the cart was closed, else False."""
+        return self._closed
+
+    def close(self):
+        """Empty the cart and stop repricing it."""
+        self._pricer.close_cart(self)
+
+
+class CartPricer:
+    """Reprices the lines of open carts when the promotion or price of their products changes."""
+
+    def __init__(self, subscribers=()):
+        """
+        Initialize a pricer with no open carts. Each subscriber is called with
+        (cart, previous total) whenever a promotion or price change reprices a cart.
+        """
+        self._subscribers = tuple(subscribers)
+        self._carts = {}
+        self._next_cart_id = itertools.count(1)
+        # dependency graph: promotion -> product IDs -> carts, and the last seen
+        # (product, promotion, price) of each product in a cart
+        self._promotion_products = {}
+        self._product_carts = {}
+        self._pricing = {}
+        products.watch_changes(self)
+
+    def open_cart(self):
+        """Return a new, empty cart."""
+        cart = Cart(self, next(self._next_cart_id))
+        self._carts[cart.get_id()] = cart
+        return cart
+
+    def get_cart(self, cart_id):
+        """Return the open cart with the given ID, or None if there is none."""
+        return self._carts.get(cart_id)
+
+    def get_cart_count(self):
+        """Return the number of open carts."""
+        return len(self._carts)
+
+    def close_cart(self, cart):
+        """Empty the cart and stop repricing it."""
+        if cart.is_closed():
+            return
+        for prod, _ in cart.get_shopping_list():
+            cart.set_line(prod, 0)
+        cart._closed = True  # pylint: disable=protected-access
+        self._carts.pop(cart.get_id(), None)
+
+    def get_carts(self, prod):
+        """Return the open carts containing the product."""
+        return list(self._product_carts.get(prod.get_id(), ()))
+
+    def get_products(self, promotion):
+        """Return the IDs of the products in open carts that carry the promotion."""
+        return set(self._promotion_products.get(promotion, ()))
+
+    def _track(self, cart, prod):
+        """Add a cart line of the product to the dependency graph."""
+        carts = self._product_carts.get(prod.get_id())
+        if carts is None:
+            carts = self._product_carts[prod.get_id()] = set()
+            promotion = prod.get_promotion()
+            self._pricing[prod.get_id()] = (prod, promotion, prod.get_price())
+            if promotion is not None:
+                self._promotion_products.setdefault(promotion, set()).add(prod.get_id())
+        carts.add(cart)
+
+    def _untrack(self, cart, prod):
+        """Remove a cart line of the product from the dependency graph."""
+        carts = self._product_carts[prod.get_id()]
+        carts.discard(cart)
+        if not carts:
+            del self._product_carts[prod.get_id()]
+            _, promotion, _ = self._pricing.pop(prod.get_id())
+            self._unlink(promotion, prod.get_id())
+
+    def _unlink(self, promotion, product_id):
+        """Remove the product from the promotion's products."""
+        if promotion is not None:
+            promoted = self._promotion_products[promotion]
+            promoted.discard(product_id)
+            if not promoted:
+                del self._promotion_products[promotion]
+
+    def product_changed(self, prod):
+        """Reprice the carts containing the product if its promotion or price changed."""
+        product_id = prod.get_id()
+        if product_id not in self._product_carts:
+            return
+        _, promotion, price = self._pricing[product_id]
+        if promotion is prod.get_promotion() and price == prod.get_price():
+            return
+        if promotion is not prod.get_promotion():
+            self._unlink(promotion, product_id)
+            if prod.get_promotion() is not None:
+                self._promotion_products.setdefault(prod.get_promotion(), set()).add(product_id)
+        self._pricing[product_id] = (prod, prod.get_promotion(), prod.get_price())
+        self._reprice(prod)
+
+    def promotion_changed(self, promotion):
+        """Reprice the carts containing products of a promotion whose terms changed."""
+        for product_id in list(self._promotion_products.get(promotion, ())):
+            self._reprice(self._pricing[product_id][0])
+
+    def _reprice(self, prod):
+        """Reprice the product's line in each cart containing it and notify subscribers."""
+        # a subscriber may close or change carts meanwhile, so loop over a copy
+        for cart in tuple(self._product_carts[prod.get_id()]):
+            if cart not in self._product_carts.get(prod.get_id(), ()):
+                continue
+            previous_total = cart._reprice_line(prod)  # pylint: disable=protected-access
+            for subscriber in self._subscribers:
+                subscriber(cart, previous_total)
+
+    def close(self):
+        """Stop watching product changes."""
+        products.unwatch_changes(self)
@@ -0,0 +1,71 @@
+"""
+Catalog sources for the store.
+
+A catalog is described by rows of (kind, name, price, quantity, maximum,
+promotion) and turned into products lazily, one row at a time, so a Store
+built from a catalog source only materializes its products on first access.
+Promotions are referred to by key and are only created when a row needs them.
+"""
+
+
+import products
+import promotions
+
+
+PROMOTION_FACTORIES = {"second_half_price": promotions.SecondHalfPrice,
+                       "third_one_free": promotions.ThirdOneFree,
+                       "thirty_percent": lambda: promotions.PercentDiscount(disc_percent=30)}
+
+DEFAULT_CATALOG = [("product", "MacBook Air M2", 1450, 100, None, "second_half_price"),
+                   ("product", "Bose QuietComfort Earbuds", 250, 500, None, "third_one_free"),
+                   ("product", "Google Pixel 7", 500, 250, None, "thirty_percent"),
+                   ("non_stocked", "Windows License", 125, None, None, "second_half_price"),
+                   ("limited", "Shipping", 10, 250, 1, "thirty_percent")]
+
+
+_promotions = {}
+
+
+def get_promotion(key):
+    """Return the shared promotion instance for the key, creating it on first use."""
+    promotion = _promotions.get(key)
+    if promotion is None:
+        if key not in PROMOTION_FACTORIES:
+            raise ValueError(f"Unknown promotion {key}")
+        promotion = _promotions[key] = PROMOTION_FACTORIES[key]()
+    return promotion
+
+
+def make_product(kind, name, price, quantity=None, maximum=None, promotion=None):
+    """Build a product of the given kind from one catalog row."""
+    if kind == "product":
+        prod = products.Product(name, price=price, quantity=quantity)
+    elif kind == "non_stocked":
+        prod = products.NonStockedProduct(name, price=price)
+    elif kind == "limited":
+        prod = products.LimitedProduct(name, price=price, quantity=quantity,
+                                       maximum=int(maximum))
+    else:
+        raise ValueError(f"Unknown product kind {kind}")
+    if promotion:
+        prod.set_promotion(get_promotion(promotion))
+    return prod
+
+
+def load_catalog(rows=None):
+    """Lazily yield the products described by the catalog rows (the default catalog if None)."""
+    for row in DEFAULT_CATALOG if rows is None else rows:
+        yield make_product(*row)
+
+
+def read_catalog(path):
+    """
+    Lazily yield the products of a CSV catalog file with the columns
+    kind,name,price,quantity,maximum,promotion. The file is only opened
+    once the first product is requested.
+    """
+    import csv  # pylint: disable=import-outside-toplevel  # keeps csv/re off the startup path
+    with open(path, newline="", encoding="utf-8") as catalog_file:
+        for row in csv.reader(catalog_file):
+            if row and not row[0].startswith("#"):
+                yield make_product(*row)
@@ -0,0 +1,152 @@
+"""
+Per-customer purchase limits over a rolling time window.
+
+CustomerLimits caps how many units of a product one customer may buy within
+a rolling window (by default a day), across any number of orders. Each
+(customer, product) pair is counted with a sliding window counter: the units
+bought in the current fixed window plus the previous window's units weighted
+by how much of it still overlaps the rolling window. That estimate needs only
+three numbers per pair, packed into a single int, and checking or recording a
+purchase is O(1). Pairs are kept in least-recently-bought order, and beyond
+max_entries the expired ones are dropped, oldest first. A counter still inside
+the rolling window is never dropped, since that would reset its allowance:
+while every kept counter is live, purchases of new pairs are rejected instead,
+so memory stays bounded however many customers there are.
+"""
+
+
+import time
+from collections import OrderedDict
+
+
+OVER_CUSTOMER_LIMIT = ("over_customer_limit",
+                       "The requested quantity is higher than the customer's limit for this period")
+CUSTOMER_LIMITS_FULL = ("customer_limits_full",
+                        "Too many customers are limited in this period, please try again later")
+
+_FIELD_BITS = 32
+_FIELD_MASK = (1 << _FIELD_BITS) - 1
+
+
+def _pack(window_index, current, previous):
+    """Return the window index and the current and previous window counts as one int."""
+    return (window_index << 2 * _FIELD_BITS) | (current << _FIELD_BITS) | previous
+
+
+def _unpack(value):
+    """Return (window index, current count, previous count) of a packed counter."""
+    return value >> 2 * _FIELD_BITS, (value >> _FIELD_BITS) & _FIELD_MASK, value & _FIELD_MASK
+
+
+class CustomerLimits:
+    """Rolling-window unit limits per customer and product, with bounded memory."""
+
+    def __init__(self, window=86400.0, default_limit=None, max_entries=1000000,
+                 clock=time.time):
+        """
+        Initialize limits over a rolling window of the given number of seconds.
+        Products without a limit of their own get default_limit (None for no limit).
+        At most max_entries (customer, product) counters are kept inside the window.
+        """
+        if window <= 0:
+            raise ValueError("Invalid window, please provide a number of seconds greater "
+                             "than zero")
+        if max_entries < 1:
+            raise ValueError("Invalid maximum number of entries, please provide a number "
+                             "greater than zero")
+        self._window = window
+        self._default_limit = default_limit
+        self._max_entries = max_entries
+        self._clock = clock
+        self._limits = {}
+        self._counters = OrderedDict()
+
+    def __len__(self):
+        """Return the number of (customer, product) counters kept."""
+        return len(self._counters)
+
+    def set_limit(self, prod, units):
+        """Limit the units of the product any one customer may buy per window."""
+        if isinstance(units, bool) or not isinstance(units, int) or units < 0:
+            raise ValueError("Invalid limit, please provide a whole number, "
+                             "greater or equal to zero")
+        self._limits[prod.get_id()] = units
+
+    def remove_limit(self, prod):
+        """Remove the limit of the product, falling back to the default limit."""
+        self._limits.pop(prod.get_id(), None)
+
+    def get_limit(self, prod):
+        """Return the per-window limit of the product, or None if it has none."""
+        return self._limits.get(prod.get_id(), self._default_limit)
+
+    def _counts(self, key, now):
+        """Return (window index, current count, previous count) of a key, rolled to now."""
+        window_index = int(now // self._window)
+        value = self._counters.get(key)
+        if value is None:
+            return window_index, 0, 0
+        last_index, current, previous = _unpack(value)
+        if last_index == window_index:
+            return window_index, current, previous
+        if last_index == window_index - 1:
+            return window_index, 0, current
+        return window_index, 0, 0
+
+    def _evict_expired(self, window_index):
+        """Drop the oldest counters that no longer count within the rolling window."""
+        counters = self._counters
+        while counters:
+            key = next(iter(counters))
+            # counters are in recording order, so the first live one ends the scan
+            if _unpack(counters[key])[0] >= window_index - 1:
+                break
+            del counters[key]
+
+    def _is_full(self, key, window_index):
+        """Return True if a new counter for key cannot be kept without dropping a live one."""
+        if key in self._counters or len(self._counters) < self._max_entries:
+            return False
+        self._evict_expired(window_index)
+        return len(self._counters) >= self._max_entries
+
+    def _estimate(self, current, previous, now):
+        """Return the estimated units bought within the rolling window ending now."""
+        overlap = 1 - (now % self._window) / self._window
+        return current + previous * overlap
+
+    def get_purchased(self, customer_id, prod):
+        """Return the estimated units of the product the customer bought in the window."""
+        now = self._clock()
+        _, current, previous = self._counts((customer_id, prod.get_id()), now)
+        return self._estimate(current, previous, now)
+
+    def get_purchase_error(self, customer_id, prod, quantity):
+        """
+        Return OVER_CUSTOMER_LIMIT if buying quantity would exceed the limit, or
+        CUSTOMER_LIMITS_FULL if the purchase could not be counted, else None.
+        """
+        limit = self._limits.get(prod.get_id(), self._default_limit)
+        if limit is None:
+            return None
+        now = self._clock()
+        key = (customer_id, prod.get_id())
+        window_index, current, previous = self._counts(key, now)
+        if self._is_full(key, window_index):
+            return CUSTOMER_LIMITS_FULL
+        if self._estimate(current, previous, now) + quantity > limit:
+            return OVER_CUSTOMER_LIMIT
+        return None
+
+    def record(self, customer_id, prod, quantity):
+        """Count quantity units of a limited product as bought by the customer now."""
+        if self._limits.get(prod.get_id(), self._default_limit) is None:
+            return
+        key = (customer_id, prod.get_id())
+        window_index, current, previous = self._counts(key, self._clock())
+        counters = self._counters
+        counters[key] = _pack(window_index, min(current + quantity, _FIELD_MASK), previous)
+        counters.move_to_end(key)
+        if len(counters) > self._max_entries:
+            # live counters are kept even beyond max_entries, get_purchase_error() stops growth
+            self._evict_expired(window_index)
@@ -0,0 +1,96 @@
+"""
+Idempotency keys for store orders.
+
+An IdempotencyCache remembers the result of each keyed call for a limited
+time and up to a limited number of keys. Repeating a key returns the cached
+result instead of running the call again; a caller repeating a key whose call
+is still running waits for that call and gets its result. Keys are never
+forgotten while their call is running, so lookups are O(1) and memory is
+bounded by max_entries plus the number of calls running at once.
+"""
+
+
+import threading
+import time
+from collections import OrderedDict
+
+
+class _Entry:
+    """Result slot of one keyed call."""
+    __slots__ = ("expires", "done", "result", "failed")
+
+    def __init__(self, expires):
+        """Initialize a pending entry that expires at the given clock time."""
+        self.expires = expires
+        self.done = threading.Event()
+        self.result = None
+        self.failed = False
+
+
+class IdempotencyCache:
+    """Bounded, time-evicted table of results by idempotency key, safe for concurrent callers."""
+
+    def __init__(self, max_entries=10000, ttl=600.0, clock=time.monotonic):
+        """Initialize a cache keeping at most max_entries results for ttl seconds each."""
+        if max_entries < 1:
+            raise ValueError("Invalid maximum number of entries, please provide a number "
+                             "greater than zero")
+        if ttl <= 0:
+            raise ValueError("Invalid time to live, please provide a number greater than zero")
+        self._max_entries = max_entries
+        self._ttl = ttl
+        self._clock = clock
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        """Return the number of keys currently remembered."""
+        return len(self._entries)
+
+    def _evict(self, now):
+        """
+        Drop expired entries and the oldest ones beyond max_entries (lock held).
+        Entries whose call is still running are moved behind the others instead.
+        """
+        entries = self._entries
+        for _ in range(len(entries)):
+            key, entry = next(iter(entries.items()))
+            if entry.expires > now and len(entries) < self._max_entries:
+                break
+            if entry.done.is_set():
+                del entries[key]
+            else:
+                entries.move_to_end(key)
+
+    def run(self, key, func, *args):
+        """
+        Return func(*args) for the first call with key, and the same result for
+        repeated calls with key until it expires. If the first call raises, the
+        key is forgotten so that a retry runs the call again.
+        """
+        while True:
+            with self._lock:
+                now = self._clock()
+                entry = self._entries.get(key)
+                if entry is not None and entry.expires <= now and entry.done.is_set():
+                    del self._entries[key]
+                    entry = None
+                if entry is None:
+                    self._evict(now)
+                    entry = self._entries[key] = _Entry(now + self._ttl)
+                    break
+            entry.done.wait()
+            if not entry.failed:
+                return entry.result
+
+        try:
+            entry.result = func(*args)
+        except BaseException:
+            entry.failed = True
+            with self._lock:
+                if self._entries.get(key) is entry:
+                    del self._entries[key]
+            raise
+        finally:
+            entry.done.set()
+        return entry.result
@@ -0,0 +1,108 @@
+"""
+In-process sales ledger.
+
+A SalesLedger attached to a Store with Store.set_ledger() records every
+committed order line (product, quantity, list price, charged price and
+promotion). Revenue, units and discount are kept as running totals overall,
+per product and per promotion, so reading them is O(1). The recorded lines
+are stored column by column and can be exported for offline analysis.
+"""
+
+
+from array import array
+
+
+class SalesLedger:
+    """Records committed order lines and keeps incrementally updated sales aggregates."""
+
+    def __init__(self, keep_lines=True):
+        """Initialize an empty ledger; with keep_lines False only the aggregates are kept."""
+        self._keep_lines = keep_lines
+        self._units = 0
+        self._revenue = 0.0
+        self._discount = 0.0
+        self._line_count = 0
+        # [units, revenue, discount] per product ID and per promotion name
+        self._by_product = {}
+        self._by_promotion = {}
+        self._product_ids = array("q")
+        self._quantities = array("q")
+        self._list_prices = array("d")
+        self._charged_prices = array("d")
+        self._promotion_codes = array("q")
+        self._promotion_names = []
+        self._promotion_codes_by_name = {}
+
+    def record(self, prod, quantity, charged_price):
+        """Record a committed line: quantity units of the product sold for charged_price."""
+        list_price = prod.get_price() * quantity
+        discount = list_price - charged_price
+        promotion = prod.get_promotion()
+        promotion_name = promotion.get_name() if promotion else None
+
+        self._units += quantity
+        self._revenue += charged_price
+        self._discount += discount
+        self._line_count += 1
+        for totals, key in ((self._by_product, prod.get_id()),
+                            (self._by_promotion, promotion_name)):
+            entry = totals.get(key)
+            if entry is None:
+                entry = totals[key] = [0, 0.0, 0.0]
+            entry[0] += quantity
+            entry[1] += charged_price
+            entry[2] += discount
+
+        if self._keep_lines:
+            code = self._promotion_codes_by_name.get(promotion_name)
+            if code is None:
+                code = self._promotion_codes_by_name[promotion_name] = len(self._promotion_names)
+                self._promotion_names.append(promotion_name)
+            self._product_ids.append(prod.get_id())
+            self._quantities.append(quantity)
+            self._list_prices.append(list_price)
+            self._charged_prices.append(charged_price)
+            self._promotion_codes.append(code)
+
+    def get_revenue(self):
+        """Return the total charged amount."""
+        return self._revenue
+
+    def get_units(self):
+        """Return the total number of units sold."""
+        return self._units
+
+    def get_discount(self):
+        """Return the total discount given by promotions."""
+        return self._discount
+
+    def get_line_count(self):
+        """Return the number of recorded order lines."""
+        return self._line_count
+
+    def get_product_totals(self, product_id):
+        """Return the units, revenue and discount of the product with the given ID."""
+        units, revenue, discount = self._by_product.get(product_id, (0, 0.0, 0.0))
+        return {"units": units, "revenue": revenue, "discount": discount}
+
+    def get_promotion_totals(self, promotion_name):
+        """Return the units, revenue and discount of lines sold under the named promotion."""
+        units, revenue, discount = self._by_promotion.get(promotion_name, (0, 0.0, 0.0))
+        return {"units": units, "revenue": revenue, "discount": discount}
+
+    def to_columns(self):
+        """Return the recorded lines as a dict of equally long columns."""
+        return {"product_id": self._product_ids.tolist(),
+                "quantity": self._quantities.tolist(),
+                "list_price": self._list_prices.tolist(),
+                "charged_price": self._charged_prices.tolist(),
+                "promotion": [self._promotion_names[code] for code in self._promotion_codes]}
+
+    def export_csv(self, path):
+        """Write the recorded lines to a CSV file, one row per line."""
+        import csv  # pylint: disable=import-outside-toplevel  # kept off the startup path
+        columns = self.to_columns()
+        with open(path, "w", newline="", encoding="utf-8") as csv_file:
+            writer = csv.writer(csv_file)
+            writer.writerow(columns)
+            writer.writerows(zip(*columns.values()))
@@ -2,23 +2,31 @@
 Main application for interacting with the store.
 
 Provides a text-based menu to list products, show inventory totals,
-place orders, and exit the application.
+place orders, and exit the application. With --batch, commands are read
+from a file or stdin instead and the results are written as JSON lines.
+The catalog (the default one, or a CSV file given with --catalog) is only
+loaded when the store is first accessed.
 """
 
 
 import sys
 import products
-import promotions
 import store
 
 
+PAGE_SIZE = 10
+
+
 def list_all_products(store_p):
-    """Print all active products with their price and quantity."""
+    """Print all active products with their price and quantity, one page at a time."""
     print("------")
-    index = 1
-    for prod in store_p.get_all_products():
-        print(f"{index}. " + prod.show())
-        index += 1
+    cursor = 0
+    while cursor is not None:
+        page, cursor = store_p.get_products_page(cursor, PAGE_SIZE)
+        store.render_listing([(prod.get_id(), prod) for prod in page])
+        if cursor is not None and input("Press enter to see more products, "
+                                        "or 'q' to stop: ").strip().lower() == "q":
+            break
     print("------")
 
 
@@ -37,8 +45,11 @@ def make_an_order(store_p):
             product_nr = input("Which product number do you want (e.g. 1?)")
             if not product_nr:
                 break
-            if (any(elem.isalpha() for elem in str(product_nr)) or int(product_nr) == 0 or
-                    int(product_nr) > len(store_p.get_list_of_products())):
+            if any(elem.isalpha() for elem in str(product_nr)):
+                print("Error adding product!\n")
+                continue
+            prod = store_p.get_product(int(product_nr))
+            if prod is None or not prod.is_active():
                 print("Error adding product!\n")
                 continue
             quantity = int(input("What amount do you want? "))
@@ -48,7 +59,7 @@ def make_an_order(store_p):
                 print("Error while making order, invalid quantity provided!\n")
                 continue
 
-            order_list.append((store_p.get_list_of_products()[int(product_nr) - 1], quantity))
+            order_list.append((prod, quantity))
             print("Product added to list!\n")
         except (ValueError, TypeError):
             print("Error with your choice! Try again!\n")
@@ -67,17 +78,20 @@ FUNCTIONS = {1: list_all_products, 2: show_total_amount,
              3: make_an_order, 4: exit_fnc}
 
 
+MENU = """
+   Store Menu
+   ----------
+1. List all products in store
+2. Show total amount in store
+3. Make an order
+4. Quit"""
+
+
 def start(store_p):
     """Run the store menu loop until the user quits."""
     while True:
         try:
-            print()
-            print("   Store Menu")
-            print("   ----------")
-            print("1. List all products in store")
-            print("2. Show total amount in store")
-            print("3. Make an order")
-            print("4. Quit")
+            print(MENU)
             user_input = int(input("Please choose a number: "))
             if 0 < user_input <= len(FUNCTIONS):
                 FUNCTIONS[user_input](store_p)
@@ -85,26 +99,89 @@ def start(store_p):
             print("Error with your choice! Try again!")
 
 
+def product_record(prod):
+    """Return a JSON-ready record of the product, keyed by its ID."""
+    promotion = prod.get_promotion()
+    return {"command": "list", "id": prod.get_id(), "name": prod.get_name(),
+            "price": prod.get_price(),
+            "quantity": (None if isinstance(prod, products.NonStockedProduct)
+                         else prod.get_quantity()),
+            "promotion": promotion.get_name() if promotion else None}
+
+
+def parse_order(store_p, arguments):
+    """Resolve order arguments of the form ID:QUANTITY to (product, quantity) pairs."""
+    order_list = []
+    for argument in arguments:
+        product_id, _, quantity = argument.partition(":")
+        prod = store_p.get_product(int(product_id))
+        if prod is None:
+            raise ValueError(f"Product {product_id} not found in inventory")
+        if int(quantity) <= 0:
+            raise ValueError(f"Invalid quantity {quantity} for product {product_id}")
+        order_list.append((prod, int(quantity)))
+    return order_list
+
+
+def run_batch(store_p, commands, out):
+    """
+    Run 'list', 'total' and 'order ID:QUANTITY ...' commands, one per line, without
+    any menu, writing one JSON object per result line to out. Blank lines and lines
+    starting with '#' are skipped, and 'quit' stops reading further commands.
+    """
+    # pylint: disable=import-outside-toplevel  # kept off the interactive startup path
+    import contextlib
+    import json
+    write = out.write
+    for line_nr, line in enumerate(commands, 1):
+        command, *arguments = line.split() or ["#"]
+        if command.startswith("#"):
+            continue
+        if command == "quit":
+            break
+        try:
+            if command == "list":
+                for _, prod in store_p.iter_products():
+                    write(json.dumps(product_record(prod)) + "\n")
+            elif command == "total":
+                write(json.dumps({"command": "total",
+                                  "quantity": store_p.get_total_quantity()}) + "\n")
+            elif command == "order":
+                order_list = parse_order(store_p, arguments)
+                # purchase messages are diagnostics, keep them out of the JSON stream
+                with contextlib.redirect_stdout(sys.stderr):
+                    total_payment = store_p.order(order_list)
+                write(json.dumps({"command": "order", "total": total_payment}) + "\n")
+            else:
+                raise ValueError(f"Unknown command {command}")
+        except ValueError as error:
+            write(json.dumps({"command": command, "line": line_nr, "error": str(error)}) + "\n")
+    out.flush()
+
+
+def main(argv=None):
+    """Build the store from its catalog source and run the menu or a batch of commands."""
+    # pylint: disable=import-outside-toplevel  # only needed once started
+    import argparse
+    import catalog
+    parser = argparse.ArgumentParser(description="Best Buy store")
+    parser.add_argument("--batch", metavar="FILE",
+                        help="run commands from FILE ('-' for stdin) instead of the menu")
+    parser.add_argument("--catalog", metavar="CSV",
+                        help="load the products from a CSV catalog instead of the default one")
+    args = parser.parse_args(argv)
+
+    # products and promotions are only created when the store is first accessed
+    source = catalog.load_catalog() if args.catalog is None else catalog.read_catalog(args.catalog)
+    best_buy = store.Store(source=source)
+    if args.batch is None:
+        start(best_buy)
+    elif args.batch == "-":
+        run_batch(best_buy, sys.stdin, sys.stdout)
+    else:
+        with open(args.batch, encoding="utf-8") as command_file:
+            run_batch(best_buy, command_file, sys.stdout)
+
+
 if __name__ == "__main__":
-    # setup initial stock of inventory
-    product_list = [products.Product("MacBook Air M2", price=1450, quantity=100),
-                    products.Product("Bose QuietComfort Earbuds", price=250, quantity=500),
-                    products.Product("Google Pixel 7", price=500, quantity=250),
-                    products.NonStockedProduct("Windows License", price=125),
-                    products.LimitedProduct("Shipping", price=10, quantity=250, maximum=1)
-                    ]
-
-    # Create promotion catalog
-    second_half_price = promotions.SecondHalfPrice()
-    third_one_free = promotions.ThirdOneFree()
-    thirty_percent = promotions.PercentDiscount(disc_percent=30)
-
-    # Add promotions to products
-    product_list[0].set_promotion(second_half_price)
-    product_list[1].set_promotion(third_one_free)
-    product_list[2].set_promotion(thirty_percent)
-    product_list[3].set_promotion(second_half_price)
-    product_list[4].set_promotion(thirty_percent)
-
-    best_buy = store.Store(product_list)
-    start(best_buy)
+    main()
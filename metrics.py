@@ -0,0 +1,279 @@
+"""
+Hot-path instrumentation for the store.
+
+Keeps counters (orders, order lines, purchase rejections by reason, units sold
+per product type) and latency histograms (Store.order, Product.buy and
+promotion pricing). Instrumentation is disabled by default. While disabled,
+timed methods are the plain, unwrapped functions (enable() installs the timing
+wrappers and disable() removes them), and every counter hook costs a single
+check of the module-level ENABLED flag. While enabled, recording a value only
+appends it to a pending list; values are aggregated in batches, and timing
+wrappers take the parameters of the method they wrap.
+
+The collected values can be read with snapshot(), rendered in the Prometheus
+text format with to_prometheus(), or written to a local JSON file with
+write_json().
+"""
+
+
+import time
+# the low-level thread module keeps functools/threading off the startup path
+import _thread
+
+
+ENABLED = False
+
+# upper bounds of the latency histogram buckets, in seconds
+BUCKETS = (0.000001, 0.0000025, 0.000005, 0.00001, 0.000025, 0.00005, 0.0001,
+           0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+
+# recording only appends to the pending list of its (name, labels) key, which is
+# atomic under the GIL and needs no lock; pending values are aggregated under _lock
+# once a list holds PENDING_SIZE values, and before every snapshot
+PENDING_SIZE = 4096
+_lock = _thread.allocate_lock()
+_pending_counts = {}
+_pending_observations = {}
+_counters = {}
+_histograms = {}
+_bisect_left = None
+# [class, attribute, plain function, histogram name, labels, timing wrapper or None]
+# of every timed method; wrappers are only built on first enable()
+_timed_methods = []
+# code flags of functions taking *args or **kwargs
+_CO_VARARGS = 0x04
+_CO_VARKEYWORDS = 0x08
+
+
+def enable(timing=True):
+    """
+    Start collecting metrics, installing the timing wrappers of the timed methods.
+    With timing False only the counters are collected and the methods stay unwrapped.
+    """
+    global ENABLED  # pylint: disable=global-statement
+    ENABLED = True
+    if timing:
+        for method in _timed_methods:
+            if method[5] is None:
+                method[5] = _timing_wrapper(method[2], method[3], method[4])
+            setattr(method[0], method[1], method[5])
+
+
+def disable():
+    """Stop collecting metrics, keeping the values collected so far."""
+    global ENABLED  # pylint: disable=global-statement
+    ENABLED = False
+    for owner, attribute, func, *_ in _timed_methods:
+        setattr(owner, attribute, func)
+
+
+def is_enabled():
+    """Return True if metrics are being collected."""
+    return ENABLED
+
+
+def reset():
+    """Drop all collected values."""
+    with _lock:
+        for pending in (*_pending_counts.values(), *_pending_observations.values()):
+            del pending[:]
+        _counters.clear()
+        _histograms.clear()
+
+
+def inc(name, labels=(), amount=1):
+    """Add amount to the counter with the given name and (key, value) label pairs."""
+    try:
+        amounts = _pending_counts[name, labels]
+    except KeyError:
+        amounts = _pending_counts.setdefault((name, labels), [])
+    amounts.append(amount)
+    if len(amounts) >= PENDING_SIZE:
+        _flush()
+
+
+def observe(name, seconds, labels=()):
+    """Record a duration in seconds in the histogram with the given name and labels."""
+    try:
+        durations = _pending_observations[name, labels]
+    except KeyError:
+        durations = _pending_observations.setdefault((name, labels), [])
+    durations.append(seconds)
+    if len(durations) >= PENDING_SIZE:
+        _flush()
+
+
+def _take(pending):
+    """Remove and return the values of a pending list (lock held)."""
+    # values appended by other threads meanwhile land after count, and stay pending
+    count = len(pending)
+    values = pending[:count]
+    del pending[:count]
+    return values
+
+
+def _record(key, durations):
+    """Add durations in seconds to the histogram of key (lock held)."""
+    global _bisect_left  # pylint: disable=global-statement
+    if _bisect_left is None:
+        import bisect  # pylint: disable=import-outside-toplevel  # kept off the startup path
+        _bisect_left = bisect.bisect_left
+    histogram = _histograms.get(key)
+    if histogram is None:
+        # one count per bucket plus the +Inf bucket, then the sum of all observations
+        histogram = _histograms[key] = [0] * (len(BUCKETS) + 1) + [0.0]
+    for seconds in durations:
+        histogram[_bisect_left(BUCKETS, seconds)] += 1
+    histogram[-1] += sum(durations)
+
+
+def _aggregate():
+    """Aggregate all pending values into the counters and histograms (lock held)."""
+    # keys added by other threads meanwhile are picked up by the next aggregation
+    for key, amounts in tuple(_pending_counts.items()):
+        if amounts:
+            _counters[key] = _counters.get(key, 0) + sum(_take(amounts))
+    for key, durations in tuple(_pending_observations.items()):
+        if durations:
+            _record(key, _take(durations))
+
+
+def _flush():
+    """Aggregate all pending values into the counters and histograms."""
+    with _lock:
+        _aggregate()
+
+
+_WRAPPER_SOURCE = """
+def wrapper({parameters}):
+    _timed_start = _timed_clock()
+    try:
+        return _timed_func({arguments})
+    finally:
+        _timed_durations.append(_timed_clock() - _timed_start)
+        if len(_timed_durations) >= _timed_size:
+            _timed_flush()
+"""
+
+
+def _timing_wrapper(func, name, labels):
+    """
+    Return a wrapper of func recording its latency in the histogram name. The wrapper
+    takes the same parameters as func, so calls do not pack *args and **kwargs.
+    """
+    durations = _pending_observations.setdefault((name, labels), [])
+    code = func.__code__
+    if code.co_flags & (_CO_VARARGS | _CO_VARKEYWORDS) or code.co_kwonlyargcount:
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                durations.append(time.perf_counter() - start)
+                if len(durations) >= PENDING_SIZE:
+                    _flush()
+    else:
+        names = code.co_varnames[:code.co_argcount]
+        defaults = func.__defaults__ or ()
+        namespace = {"_timed_clock": time.perf_counter, "_timed_func": func,
+                     "_timed_durations": durations, "_timed_size": PENDING_SIZE,
+                     "_timed_flush": _flush}
+        parameters = list(names)
+        for index, default in enumerate(defaults, len(names) - len(defaults)):
+            namespace[f"_timed_default_{index}"] = default
+            parameters[index] = f"{names[index]}=_timed_default_{index}"
+        exec(_WRAPPER_SOURCE.format(  # pylint: disable=exec-used  # built from code names
+            parameters=", ".join(parameters), arguments=", ".join(names)), namespace)
+        wrapper = namespace["wrapper"]
+    wrapper.__name__ = func.__name__
+    wrapper.__qualname__ = func.__qualname__
+    wrapper.__doc__ = func.__doc__
+    wrapper.__wrapped__ = func
+    return wrapper
+
+
+class _TimedMethod:
+    """Stand-in for a timed method, replaced by the method itself once its class exists."""
+
+    def __init__(self, func, name, labels):
+        """Remember the method and the histogram its latency goes to."""
+        self._func = func
+        self._name = name
+        self._labels = labels
+
+    def __set_name__(self, owner, attribute):
+        """Register the method and put the plain or the timed version on the class."""
+        method = [owner, attribute, self._func, self._name, self._labels, None]
+        _timed_methods.append(method)
+        if ENABLED:
+            method[5] = _timing_wrapper(self._func, self._name, self._labels)
+        setattr(owner, attribute, method[5] or self._func)
+
+
+def timed(name, labels=()):
+    """
+    Decorate a method so that its latency is recorded while metrics are enabled.
+    The timing wrapper is only installed while enabled, so it costs nothing otherwise.
+    """
+    def decorator(func):
+        return _TimedMethod(func, name, labels)
+    return decorator
+
+
+def snapshot():
+    """Return a copy of all counters and histograms, from every thread, as plain data."""
+    with _lock:
+        _aggregate()
+        merged_counters = dict(_counters)
+        merged_histograms = {key: histogram[:] for key, histogram in _histograms.items()}
+
+    counters = [{"name": name, "labels": dict(labels), "value": value}
+                for (name, labels), value in sorted(merged_counters.items())]
+    histograms = []
+    for (name, labels), histogram in sorted(merged_histograms.items()):
+        cumulative = 0
+        buckets = []
+        for bound, count in zip(BUCKETS + ("+Inf",), histogram[:-1]):
+            cumulative += count
+            buckets.append([bound, cumulative])
+        histograms.append({"name": name, "labels": dict(labels), "buckets": buckets,
+                           "sum": histogram[-1], "count": cumulative})
+    return {"counters": counters, "histograms": histograms}
+
+
+def _format_labels(labels, extra=()):
+    """Return the Prometheus label set for the label dict and extra (key, value) pairs."""
+    pairs = list(labels.items()) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{key}="{value}"' for key, value in pairs) + "}"
+
+
+def to_prometheus():
+    """Return all metrics in the Prometheus text exposition format."""
+    data = snapshot()
+    lines = []
+    typed = set()
+    for counter in data["counters"]:
+        if counter["name"] not in typed:
+            typed.add(counter["name"])
+            lines.append(f"# TYPE {counter['name']} counter")
+        lines.append(f"{counter['name']}{_format_labels(counter['labels'])} {counter['value']}")
+    for histogram in data["histograms"]:
+        name = histogram["name"]
+        if name not in typed:
+            typed.add(name)
+            lines.append(f"# TYPE {name} histogram")
+        for bound, count in histogram["buckets"]:
+            lines.append(f"{name}_bucket{_format_labels(histogram['labels'], [('le', bound)])}"
+                         f" {count}")
+        lines.append(f"{name}_sum{_format_labels(histogram['labels'])} {histogram['sum']}")
+        lines.append(f"{name}_count{_format_labels(histogram['labels'])} {histogram['count']}")
+    return "\n".join(lines) + "\n"
+
+
+def write_json(path):
+    """Write a snapshot of all metrics to a local JSON file."""
+    import json  # pylint: disable=import-outside-toplevel  # kept off the startup path
+    with open(path, "w", encoding="utf-8") as metrics_file:
+        json.dump(snapshot(), metrics_file, indent=2)
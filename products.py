@@ -5,12 +5,77 @@ Defines the Product class for representing store items with attributes
 such as name, price, quantity, and active status. Provides methods for
 inventory management, product activation/deactivation, displaying product
 details, and processing purchases.
+
+Every product gets a compact integer ID when it is created, and the module
+keeps a registry so that products can be looked up by ID in O(1). Objects
+registered with watch_changes() are told about every product change.
 """
 
 
+import sys
+# the low-level thread module keeps threading off the startup path
+import _thread
+import metrics
 import promotions
 
 
+INVALID_QUANTITY = ("invalid_quantity",
+                    "Invalid quantity, please provide a real number, greater or equal to zero")
+INSUFFICIENT_STOCK = ("insufficient_stock",
+                      "The requested quantity is higher than the current stock")
+OVER_LIMIT = ("over_limit", "The requested quantity is higher than maximum per order")
+
+
+# created on first use, so that weakref and itertools stay off the startup path
+_next_id = None
+_registry = None
+_change_watchers = None
+_registry_lock = _thread.allocate_lock()
+
+
+def _start_registry():
+    """Create the ID counter, the product registry and the change watchers, once."""
+    # pylint: disable=import-outside-toplevel,global-statement
+    global _next_id, _registry, _change_watchers
+    import itertools
+    import weakref
+    with _registry_lock:
+        if _registry is None:
+            _next_id = itertools.count(1)
+            _change_watchers = weakref.WeakSet()
+            _registry = weakref.WeakValueDictionary()
+
+
+def get_product_by_id(product_id):
+    """Return the live product with the given ID, or None if there is none."""
+    return None if _registry is None else _registry.get(product_id)
+
+
+def watch_changes(watcher):
+    """
+    Call watcher.product_changed(product) whenever the price, quantity, status,
+    limit or promotion of any product changes, for as long as the watcher lives.
+    """
+    if _registry is None:
+        _start_registry()
+    _change_watchers.add(watcher)
+
+
+def unwatch_changes(watcher):
+    """Stop notifying the watcher about product changes."""
+    if _change_watchers is not None:
+        _change_watchers.discard(watcher)
+
+
+def parse_low_stock_threshold(threshold):
+    """Return the low-water mark as an integer, or raise ValueError if it is invalid."""
+    if (str(threshold) == "" or any(elem.isalpha() for elem in str(threshold))
+            or int(threshold) < 0):
+        raise ValueError("Invalid low stock threshold, please provide a real number, "
+                         "greater or equal to zero")
+    return int(threshold)
+
+
 class Product:
     """
     Represents a product with a name, price, quantity, and active status.
@@ -22,31 +87,64 @@ class Product:
         """Initialize a product with name, price, and quantity."""
         if str(name) == "":
             raise ValueError("Product name cannot be empty")
-        self._name = str(name)
 
         if str(price) == "" or any(elem.isalpha() for elem in str(price)) or float(price) < 0:
             raise ValueError("Invalid price, please provide a real number, "
                              "greater than zero")
-        self._price = float(price)
 
         if (str(quantity) == "" or any(elem.isalpha() for elem in str(quantity))
                 or int(quantity) < 0):
             raise ValueError("Invalid quantity, please provide a real number, "
                              "greater or equal to zero")
-        self._quantity = int(quantity)
+        self._setup(str(name), float(price), int(quantity), active and int(quantity) != 0)
+
+    def _setup(self, name, price, quantity, active):
+        """Set the validated fields of a new product and register it under a new ID."""
+        # interned, so that products with the same name share one string
+        self._name = sys.intern(name)
+        self._price = price
+        self._quantity = quantity
         self._active = active
-        if self._quantity == 0:
-            self._active = False
         self._promotion = None
+        self._shown = None
+        self._low_stock = None
+        self._low_stock_subscribers = ()
+        if _registry is None:
+            _start_registry()
+        self._id = next(_next_id)
+        _registry[self._id] = self
+
+    @classmethod
+    def restore(cls, name, price, quantity, active, promotion=None):
+        """
+        Return a new product of this class from already validated field values, such
+        as those of a serialized product, skipping validation. It gets a new ID.
+        """
+        prod = cls.__new__(cls)
+        prod._setup(name, price, quantity, active)
+        prod._promotion = promotion
+        return prod
+
+    def get_id(self):
+        """Return the unique ID of the product."""
+        return self._id
 
     def get_name(self):
         """Return the name of the product."""
-        return str(self._name)
+        return self._name
 
     def get_price(self):
         """Return the name of the product."""
         return self._price
 
+    def set_price(self, price):
+        """Update the unit price of the product."""
+        if str(price) == "" or any(elem.isalpha() for elem in str(price)) or float(price) < 0:
+            raise ValueError("Invalid price, please provide a real number, "
+                             "greater than zero")
+        self._price = float(price)
+        self._changed()
+
     def get_quantity(self):
         """Return the current quantity in stock."""
         return int(self._quantity)
@@ -58,9 +156,56 @@ class Product:
             raise ValueError("Invalid quantity, please provide a real number, "
                              "greater or equal to zero")
 
+        previous = self._quantity
         self._quantity = int(quantity)
         if self._quantity == 0:
             self._active = False
+        self._changed()
+        self._check_low_stock(previous)
+
+    def apply_update(self, quantity=None, price=None, active=None):
+        """
+        Apply already validated quantity, price and status values in one step, None
+        keeping the current value. A product restocked from zero is reactivated
+        unless an explicit status is given.
+        """
+        previous = self._quantity
+        if price is not None:
+            self._price = float(price)
+        if quantity is not None:
+            self._quantity = quantity
+            if quantity == 0:
+                self._active = False
+            elif previous == 0 and active is None:
+                self._active = True
+        if active is not None:
+            self._active = active
+        self._changed()
+        self._check_low_stock(previous)
+
+    def _check_low_stock(self, previous):
+        """Notify the low stock subscribers if the quantity fell past the low-water mark."""
+        if self._low_stock is not None and previous > self._low_stock >= self._quantity:
+            for subscriber in self._low_stock_subscribers:
+                subscriber(self, self._quantity)
+
+    def set_low_stock_alert(self, threshold, subscribers):
+        """
+        Set the low-water mark of the product. Each subscriber is called with
+        (product, quantity) when the stock falls from above the mark to or below it.
+        """
+        self._low_stock = parse_low_stock_threshold(threshold)
+        # kept as a tuple so that bulk registrations can share one subscriber sequence
+        self._low_stock_subscribers = tuple(subscribers)
+
+    def remove_low_stock_alert(self):
+        """Remove the low-water mark and its subscribers."""
+        self._low_stock = None
+        self._low_stock_subscribers = ()
+
+    def get_low_stock_threshold(self):
+        """Return the low-water mark of the product, or None if it has none."""
+        return self._low_stock
 
     def is_active(self):
         """Return True if the product is active, else False."""
@@ -69,28 +214,67 @@ class Product:
     def activate(self):
         """Mark the product as active."""
         self._active = True
+        self._changed()
 
     def deactivate(self):
         """Mark the product as inactive."""
         self._active = False
+        self._changed()
+
+    def _changed(self):
+        """Drop the cached show() line and notify the change watchers."""
+        self._shown = None
+        if _change_watchers:
+            for watcher in list(_change_watchers):
+                watcher.product_changed(self)
 
     def show(self):
-        """Display product details (name, price, quantity)."""
-        promo_info = f", Promotion: {self._promotion.get_name()}" if self._promotion else ""
-        return f"{self._name}, Price: ${self._price}, Quantity: {self._quantity}{promo_info}"
+        """Display product details (name, price, quantity), rendered once until they change."""
+        if self._shown is None:
+            self._shown = self._render()
+        return self._shown
 
-    def buy(self, quantity):
-        """Reduce stock by given quantity and return total price."""
+    def _promo_info(self):
+        """Return the promotion suffix of the product details."""
+        return f", Promotion: {self._promotion.get_name()}" if self._promotion else ""
+
+    def _render(self):
+        """Build the product details line shown by show()."""
+        return (f"{self._name}, Price: ${self._price}, "
+                f"Quantity: {self._quantity}{self._promo_info()}")
+
+    def get_purchase_error(self, quantity):
+        """Return a (reason, message) pair if quantity cannot be bought, else None."""
         if (str(quantity) == "" or any(elem.isalpha() for elem in str(quantity))
                 or int(quantity) < 0):
-            print("Invalid quantity, please provide a real number, "
-                  "greater or equal to zero")
-            return float(0)
+            return INVALID_QUANTITY
         if self._quantity < quantity:
-            print("The requested quantity is higher than the current stock")
-            return float(0)
+            return INSUFFICIENT_STOCK
+        return None
+
+    def buy(self, quantity):
+        """Reduce stock by given quantity and return total price."""
+        price = self.try_buy(quantity)
+        return float(0) if price is None else price
+
+    @metrics.timed("store_product_buy_seconds")
+    def try_buy(self, quantity):
+        """Reduce stock by given quantity and return total price, or None if it was rejected."""
+        error = self.get_purchase_error(quantity)
+        if error is not None:
+            if metrics.ENABLED:
+                metrics.inc("store_purchase_rejections_total", (("reason", error[0]),))
+            print(error[1])
+            return None
 
         self.set_quantity(self._quantity - quantity)
+        if metrics.ENABLED:
+            metrics.inc("store_units_sold_total", (("product_type", type(self).__name__),),
+                        quantity)
+        return self.get_quote(quantity)
+
+    def get_quote(self, quantity):
+        """Return the total price of quantity units at the current price and promotion."""
         if self._promotion:
             return float(self._promotion.apply_promotion(self, quantity))
         return float(self._price * quantity)
@@ -99,12 +283,14 @@ class Product:
         """Assign a promotion to the product."""
         if isinstance(promotion, promotions.Promotion):
             self._promotion = promotion
+            self._changed()
         else:
             raise TypeError("Only Promotion instances can be added")
 
     def remove_promotion(self):
         """Remove the promotion from the product."""
         self._promotion = None
+        self._changed()
 
     def get_promotion(self):
         """Return the current promotion of the product."""
@@ -127,23 +313,18 @@ class NonStockedProduct(Product):
         """Force quantity to remain zero."""
         self._quantity = 0
 
-    def show(self):
-        """Print product name, price, and fixed zero quantity."""
-        promo_info = f", Promotion: {self._promotion.get_name()}" if self._promotion else ""
-        return f"{self._name}, Price: ${self._price}, Quantity: Unlimited{promo_info}"
+    def apply_update(self, quantity=None, price=None, active=None):
+        """Apply price and status values; the quantity always remains zero."""
+        super().apply_update(None, price, active)
 
-    def buy(self, quantity):
-        """Reduce stock by given quantity and return total price."""
-        if (str(quantity) == "" or any(elem.isalpha() for elem in str(quantity))
-                or int(quantity) < 0):
-            print("Invalid quantity, please provide a real number, "
-                  "greater or equal to zero")
-            return float(0)
+    def _render(self):
+        """Build product name, price, and unlimited quantity."""
+        return f"{self._name}, Price: ${self._price}, Quantity: Unlimited{self._promo_info()}"
 
-        self.set_quantity(self._quantity - quantity) # redundant - used to clear possible failures
-        if self._promotion:
-            return float(self._promotion.apply_promotion(self, quantity))
-        return float(self._price * quantity)
+    def get_purchase_error(self, quantity):
+        """Return a (reason, message) pair if quantity is invalid; stock is never short."""
+        error = super().get_purchase_error(quantity)
+        return error if error is INVALID_QUANTITY else None
 
 
 class LimitedProduct(Product):
@@ -157,6 +338,13 @@ class LimitedProduct(Product):
         super().__init__(name, price, quantity)
         self._maximum = maximum
 
+    @classmethod
+    def restore(cls, name, price, quantity, active, promotion=None, maximum=0):
+        """Return a new limited product from already validated field values."""
+        prod = super().restore(name, price, quantity, active, promotion)
+        prod._maximum = maximum
+        return prod
+
     def get_maximum(self):
         """Return the maximum allowed quantity per order."""
         return self._maximum
@@ -168,28 +356,16 @@ class LimitedProduct(Product):
             raise ValueError("Invalid maximum quantity, please provide a real number, "
                              "greater than zero")
         self._maximum = int(maximum)
+        self._changed()
 
-    def show(self):
-        """Print product name, price, and fixed zero quantity."""
-        promo_info = f", Promotion: {self._promotion.get_name()}" if self._promotion else ""
+    def _render(self):
+        """Build product name, price, quantity, and per-order limit."""
         return (f"{self._name}, Price: ${self._price}, "
-                f"Quantity: {self._quantity}, Limit: {self._maximum}{promo_info}")
-
-    def buy(self, quantity):
-        """Purchase quantity if valid and within stock and limit."""
-        if (str(quantity) == "" or any(elem.isalpha() for elem in str(quantity))
-                or int(quantity) < 0):
-            print("Invalid quantity, please provide a real number, "
-                  "greater or equal to zero")
-            return float(0)
-        if self._quantity < quantity:
-            print("The requested quantity is higher than the current stock")
-            return float(0)
-        if self._maximum < quantity:
-            print("The requested quantity is higher than maximum per order")
-            return float(0)
-
-        self.set_quantity(self._quantity - quantity)
-        if self._promotion:
-            return float(self._promotion.apply_promotion(self, quantity))
-        return float(self._price * quantity)
+                f"Quantity: {self._quantity}, Limit: {self._maximum}{self._promo_info()}")
+
+    def get_purchase_error(self, quantity):
+        """Return a (reason, message) pair if quantity is invalid, out of stock or over limit."""
+        error = super().get_purchase_error(quantity)
+        if error is None and self._maximum < quantity:
+            return OVER_LIMIT
+        return error
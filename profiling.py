@@ -0,0 +1,168 @@
+"""
+On-demand profiling of store orders.
+
+An OrderProfiler attached to a Store with Store.set_profiler() captures a
+sample of orders, chosen by a sampling rate or by a predicate on the shopping
+list. Each captured order is written to a rotating local directory, either as
+a cProfile dump (.prof) or as a lightweight span trace (.json) of order
+compaction, membership checks, purchase checks, each buy and promotion pricing.
+
+Captured profiles can be aggregated from the command line:
+
+    python -m profiling DIRECTORY [--top 20]
+"""
+
+
+import itertools
+import os
+import random
+import sys
+import time
+
+
+# functions recorded as spans by the "trace" mode
+SPAN_NAMES = frozenset({"make_compact_order_list", "has_product", "get_purchase_error",
+                        "try_buy", "set_quantity", "apply_promotion"})
+
+
+class OrderProfiler:
+    """Captures cProfile dumps or span traces of a sample of orders into a directory."""
+
+    def __init__(self, directory, sample_rate=0.0, predicate=None, mode="cprofile",
+                 max_files=100, seed=None):
+        """
+        Initialize a profiler writing to directory. An order is captured when the
+        predicate returns True for its shopping list or, without a predicate, with
+        probability sample_rate. At most max_files captures are kept.
+        """
+        if mode not in ("cprofile", "trace"):
+            raise ValueError("Invalid profiling mode, please choose 'cprofile' or 'trace'")
+        if not 0 <= sample_rate <= 1:
+            raise ValueError("Invalid sample rate, please provide a number between 0 and 1")
+        if max_files < 1:
+            raise ValueError("Invalid maximum number of files, please provide a number "
+                             "greater than zero")
+        self._directory = directory
+        self._sample_rate = sample_rate
+        self._predicate = predicate
+        self._mode = mode
+        self._max_files = max_files
+        self._random = random.Random(seed)
+        self._sequence = itertools.count()
+        os.makedirs(directory, exist_ok=True)
+
+    def get_directory(self):
+        """Return the directory the captures are written to."""
+        return self._directory
+
+    def should_capture(self, shopping_list):
+        """Return True if the order with this shopping list should be captured."""
+        if self._predicate is not None:
+            return bool(self._predicate(shopping_list))
+        return self._sample_rate > 0 and self._random.random() < self._sample_rate
+
+    def capture(self, func, shopping_list):
+        """Run func(shopping_list) while profiling it, save the capture and return the result."""
+        name = f"order-{time.time_ns():020d}-{next(self._sequence):06d}"
+        if self._mode == "cprofile":
+            result = self._capture_cprofile(func, shopping_list, name)
+        else:
+            result = self._capture_trace(func, shopping_list, name)
+        self._rotate()
+        return result
+
+    def _capture_cprofile(self, func, shopping_list, name):
+        """Run func under cProfile and dump the stats to name.prof."""
+        import cProfile  # pylint: disable=import-outside-toplevel  # only loaded when sampling
+        profiler = cProfile.Profile()
+        try:
+            return profiler.runcall(func, shopping_list)
+        finally:
+            profiler.dump_stats(os.path.join(self._directory, name + ".prof"))
+
+    def _capture_trace(self, func, shopping_list, name):
+        """Run func while recording spans of the SPAN_NAMES functions into name.json."""
+        import json  # pylint: disable=import-outside-toplevel  # only loaded when sampling
+        spans = []
+        open_spans = []
+        origin = time.perf_counter()
+
+        def tracer(frame, event, _arg):
+            if event == "call" and frame.f_code.co_name in SPAN_NAMES:
+                span = {"name": frame.f_code.co_name, "depth": len(open_spans),
+                        "start_us": (time.perf_counter() - origin) * 1e6}
+                open_spans.append((frame, span))
+                spans.append(span)
+            elif event == "return" and open_spans and open_spans[-1][0] is frame:
+                _, span = open_spans.pop()
+                span["duration_us"] = (time.perf_counter() - origin) * 1e6 - span["start_us"]
+
+        previous = sys.getprofile()
+        sys.setprofile(tracer)
+        try:
+            result = func(shopping_list)
+        finally:
+            sys.setprofile(previous)
+            trace = {"lines": len(shopping_list) if isinstance(shopping_list, list) else 0,
+                     "duration_us": (time.perf_counter() - origin) * 1e6, "spans": spans}
+            with open(os.path.join(self._directory, name + ".json"), "w",
+                      encoding="utf-8") as trace_file:
+                json.dump(trace, trace_file)
+        return result
+
+    def _rotate(self):
+        """Delete the oldest captures beyond max_files."""
+        captures = sorted(entry.name for entry in os.scandir(self._directory)
+                          if entry.name.startswith("order-"))
+        for stale in captures[:-self._max_files]:
+            os.remove(os.path.join(self._directory, stale))
+
+
+def aggregate_traces(directory):
+    """Return {span name: {count, total_us, max_us}} summed over the span traces in directory."""
+    import json  # pylint: disable=import-outside-toplevel  # kept off the startup path
+    summary = {}
+    for entry in sorted(os.scandir(directory), key=lambda entry: entry.name):
+        if not entry.name.endswith(".json"):
+            continue
+        with open(entry.path, encoding="utf-8") as trace_file:
+            trace = json.load(trace_file)
+        for span in trace["spans"]:
+            stats = summary.setdefault(span["name"], {"count": 0, "total_us": 0.0, "max_us": 0.0})
+            duration = span.get("duration_us", 0.0)
+            stats["count"] += 1
+            stats["total_us"] += duration
+            stats["max_us"] = max(stats["max_us"], duration)
+    return summary
+
+
+def main(argv=None):
+    """Print the aggregated cProfile stats and span traces of a capture directory."""
+    import argparse  # pylint: disable=import-outside-toplevel
+    import pstats  # pylint: disable=import-outside-toplevel
+    parser = argparse.ArgumentParser(description="Aggregate captured order profiles")
+    parser.add_argument("directory")
+    parser.add_argument("--top", type=int, default=20, help="number of functions to show")
+    parser.add_argument("--sort", default="cumulative", help="pstats sort key")
+    args = parser.parse_args(argv)
+
+    dumps = sorted(entry.path for entry in os.scandir(args.directory)
+                   if entry.name.endswith(".prof"))
+    if dumps:
+        print(f"cProfile: {len(dumps)} captured order(s)")
+        stats = pstats.Stats(*dumps)
+        stats.sort_stats(args.sort).print_stats(args.top)
+
+    summary = aggregate_traces(args.directory)
+    if summary:
+        print(f"{'span':28}{'count':>8}{'total us':>14}{'mean us':>12}{'max us':>12}")
+        for name, stats in sorted(summary.items(), key=lambda item: -item[1]["total_us"]):
+            print(f"{name:28}{stats['count']:>8}{stats['total_us']:>14.1f}"
+                  f"{stats['total_us'] / stats['count']:>12.2f}{stats['max_us']:>12.2f}")
+    if not dumps and not summary:
+        print("No captured orders found")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -12,14 +12,16 @@ Available promotions:
 """
 
 
+import sys
 from abc import ABC, abstractmethod
+import metrics
 
 
 class Promotion(ABC):
     """Abstract base class for all promotions, requiring a name and an apply_promotion method."""
     def __init__(self, name: str):
         """Initialize promotion with a name."""
-        self._name = name
+        self._name = sys.intern(name)
 
     def get_name(self):
         """Return the promotion name."""
@@ -30,6 +32,13 @@ class Promotion(ABC):
         """Apply the promotion to the given product and quantity."""
         ...
 
+    def apply_promotion_bulk(self, prices, quantities):
+        """
+        Return the promoted totals for matching arrays of unit prices and quantities
+        (zero quantities cost nothing), or None if the promotion has no bulk formula,
+        in which case callers fall back to apply_promotion.
+        """
+
 
 class SecondHalfPrice(Promotion):
     """Promotion where every second product is sold at half price."""
@@ -37,6 +46,7 @@ class SecondHalfPrice(Promotion):
         """Initialize 'Second Half Price' promotion."""
         super().__init__(name="Second Half price!")
 
+    @metrics.timed("store_promotion_apply_seconds", (("promotion", "SecondHalfPrice"),))
     def apply_promotion(self, product, quantity):
         """Apply second-half-price discount to the purchase."""
         if quantity <= 0:
@@ -45,6 +55,10 @@ class SecondHalfPrice(Promotion):
         remainder = quantity % 2
         return (pairs * 1.5 + remainder) * product.get_price()
 
+    def apply_promotion_bulk(self, prices, quantities):
+        """Apply second-half-price discount to arrays of prices and quantities."""
+        return (quantities // 2 * 1.5 + quantities % 2) * prices
+
 
 class ThirdOneFree(Promotion):
     """Promotion where every third product is free (buy 2, get 1 free)."""
@@ -52,6 +66,7 @@ class ThirdOneFree(Promotion):
         """Initialize 'Third One Free' promotion."""
         super().__init__(name="Third One Free!")
 
+    @metrics.timed("store_promotion_apply_seconds", (("promotion", "ThirdOneFree"),))
     def apply_promotion(self, product, quantity: int) -> float:
         """Apply buy-two-get-one-free discount to the purchase."""
         if quantity <= 0:
@@ -60,6 +75,10 @@ class ThirdOneFree(Promotion):
         remainder = quantity % 3
         return (groups_of_three * 2 + remainder) * product.get_price()
 
+    def apply_promotion_bulk(self, prices, quantities):
+        """Apply buy-two-get-one-free discount to arrays of prices and quantities."""
+        return (quantities // 3 * 2 + quantities % 3) * prices
+
 
 class PercentDiscount(Promotion):
     """Promotion that applies a percentage discount to all items in the purchase."""
@@ -76,9 +95,14 @@ class PercentDiscount(Promotion):
         """Return the discount percentage of the promotion."""
         return self._percent
 
+    @metrics.timed("store_promotion_apply_seconds", (("promotion", "PercentDiscount"),))
     def apply_promotion(self, product, quantity: int) -> float:
         """Apply percentage discount to the purchase."""
         if quantity <= 0:
             raise ValueError("Quantity must be greater than zero")
         discount_multiplier = (100 - self._percent) / 100
         return quantity * discount_multiplier * product.get_price()
+
+    def apply_promotion_bulk(self, prices, quantities):
+        """Apply percentage discount to arrays of prices and quantities."""
+        return quantities * ((100 - self._percent) / 100) * prices
@@ -0,0 +1,150 @@
+"""
+Vectorized inventory reporting.
+
+InventoryColumns extracts the price, quantity, status, product type and
+promotion of every product of a store into NumPy columns once, and keeps
+them up to date by patching only the rows of products that changed since the
+last report. Reports are then computed in a single vectorized pass over the
+columns instead of calling get_price()/get_quantity() product by product.
+
+Requires NumPy.
+"""
+
+
+import numpy as np
+import products
+
+
+class InventoryColumns:
+    """Columnar, incrementally patched copy of a product list for reporting queries."""
+
+    def __init__(self, list_of_products):
+        """Extract the columns of the products and start watching them for changes."""
+        self._products = list(list_of_products)
+        self._rows = {prod.get_id(): row for row, prod in enumerate(self._products)}
+        self._type_codes = {}
+        self._type_names = []
+        self._promotion_codes = {}
+        self._promotions = []
+        self._promotion_rows = None
+        self._dirty = set()
+
+        size = len(self._products)
+        self.prices = np.fromiter((prod.get_price() for prod in self._products),
+                                  dtype=np.float64, count=size)
+        self.quantities = np.fromiter((prod.get_quantity() for prod in self._products),
+                                      dtype=np.int64, count=size)
+        self.active = np.fromiter((prod.is_active() for prod in self._products),
+                                  dtype=np.bool_, count=size)
+        self.types = np.fromiter((self._type_code(prod) for prod in self._products),
+                                 dtype=np.int32, count=size)
+        self.promotions = np.fromiter((self._promotion_code(prod) for prod in self._products),
+                                      dtype=np.int32, count=size)
+        products.watch_changes(self)
+
+    def _type_code(self, prod):
+        """Return the code of the product's type, adding it to the type table if new."""
+        code = self._type_codes.get(type(prod))
+        if code is None:
+            code = self._type_codes[type(prod)] = len(self._type_names)
+            self._type_names.append(type(prod).__name__)
+        return code
+
+    def _promotion_code(self, prod):
+        """Return the code of the product's promotion (-1 for none), adding it if new."""
+        promotion = prod.get_promotion()
+        if promotion is None:
+            return -1
+        code = self._promotion_codes.get(id(promotion))
+        if code is None:
+            code = self._promotion_codes[id(promotion)] = len(self._promotions)
+            self._promotions.append(promotion)
+        return code
+
+    def product_changed(self, prod):
+        """Remember that the row of a changed product must be refreshed."""
+        if prod.get_id() in self._rows:
+            self._dirty.add(prod.get_id())
+
+    def refresh(self):
+        """Copy the current values of the changed products into their rows."""
+        # swap the set first, watchers on other threads may add to it meanwhile
+        dirty, self._dirty = self._dirty, set()
+        for product_id in dirty:
+            row = self._rows[product_id]
+            prod = self._products[row]
+            self.prices[row] = prod.get_price()
+            self.quantities[row] = prod.get_quantity()
+            self.active[row] = prod.is_active()
+            code = self._promotion_code(prod)
+            if code != self.promotions[row]:
+                self.promotions[row] = code
+                self._promotion_rows = None
+
+    def close(self):
+        """Stop watching the products for changes."""
+        products.unwatch_changes(self)
+
+    def get_type_names(self):
+        """Return the product type names, indexed by type code."""
+        return self._type_names
+
+    def get_promotions(self):
+        """Return the promotions, indexed by promotion code."""
+        return self._promotions
+
+    def get_products(self):
+        """Return the products, indexed by row."""
+        return self._products
+
+    def get_promotion_rows(self):
+        """Return the rows of each promotion, indexed by promotion code."""
+        if self._promotion_rows is None:
+            # sort the rows by promotion once, so that each promotion's rows are one slice
+            order = np.argsort(self.promotions, kind="stable")
+            codes = np.arange(len(self._promotions))
+            sorted_codes = self.promotions[order]
+            starts = np.searchsorted(sorted_codes, codes, side="left")
+            ends = np.searchsorted(sorted_codes, codes, side="right")
+            self._promotion_rows = [order[start:end] for start, end in zip(starts, ends)]
+        return self._promotion_rows
+
+
+def stock_value(columns, mask=None):
+    """Return the value of the stock at list price, optionally only for the masked rows."""
+    values = columns.prices * columns.quantities
+    return float(values.sum() if mask is None else values[mask].sum())
+
+
+def promoted_stock_value(columns, mask=None):
+    """Return the value of the stock if every unit were sold under the current promotions."""
+    values = columns.prices * columns.quantities
+    promotion_rows = columns.get_promotion_rows()
+    for promotion, rows in zip(columns.get_promotions(), promotion_rows):
+        if rows.size == 0:
+            continue
+        promoted = promotion.apply_promotion_bulk(columns.prices[rows], columns.quantities[rows])
+        if promoted is None:
+            prods = columns.get_products()
+            promoted = [promotion.apply_promotion(prods[row], int(columns.quantities[row]))
+                        if columns.quantities[row] > 0 else 0.0 for row in rows]
+        values[rows] = promoted
+    return float(values.sum() if mask is None else values[mask].sum())
+
+
+def stock_value_by_type(columns, mask=None):
+    """Return {product type name: stock value at list price}."""
+    values = columns.prices * columns.quantities
+    types = columns.types
+    if mask is not None:
+        values, types = values[mask], types[mask]
+    totals = np.bincount(types, weights=values, minlength=len(columns.get_type_names()))
+    return dict(zip(columns.get_type_names(), totals.tolist()))
+
+
+def inventory_report(columns, active_only=False):
+    """Return the stock value at list price, after promotions, and by product type."""
+    mask = columns.active if active_only else None
+    return {"stock_value": stock_value(columns, mask),
+            "promoted_stock_value": promoted_stock_value(columns, mask),
+            "stock_value_by_type": stock_value_by_type(columns, mask)}
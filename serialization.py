@@ -0,0 +1,253 @@
+"""
+Pickle-free serialization of a store's products for cross-process handoff.
+
+dumps() packs the product/promotion graph into one flat buffer: a header, the
+numeric fields of the products as struct-packed columns (ID, price, quantity,
+maximum, name, promotion, type and status), a table of the distinct
+promotions, which every product refers to by index so that shared promotions
+are written once, and a table of the distinct names. Columns are 8-byte
+aligned, so PackedCatalog can expose them as zero-copy memoryviews of the
+buffer, and to_shared_memory()/attach() hand the buffer to another process
+through multiprocessing.shared_memory without copying the columns.
+
+Rebuilt products get new IDs, since the packed ones may still belong to live
+products; to_id_map() maps each packed ID to its rebuilt product, so that IDs
+received from the sending process can still be resolved.
+
+The format uses the machine's native byte order and is meant for processes
+on the same host, not for storage.
+"""
+
+
+import struct
+import products
+import promotions
+import store
+
+
+MAGIC = b"BBS1"
+# magic, number of products, of distinct names, of distinct promotions, name bytes
+_HEADER = struct.Struct("=4sIIII")
+PRODUCT_KINDS = (products.Product, products.NonStockedProduct, products.LimitedProduct)
+# PercentDiscount is stored as two kinds, so that integer percentages stay integers
+PROMOTION_KINDS = (promotions.SecondHalfPrice, promotions.ThirdOneFree,
+                   promotions.PercentDiscount, promotions.PercentDiscount)
+
+
+def _align(offset):
+    """Return offset rounded up to a multiple of 8."""
+    return (offset + 7) & ~7
+
+
+def _layout(product_count, name_count, promotion_count, names_size):
+    """Return {section: (offset, format, count)} and the total size of the buffer."""
+    sections = (("ids", "q", product_count), ("prices", "d", product_count),
+                ("quantities", "q", product_count), ("maximums", "q", product_count),
+                ("name_codes", "I", product_count), ("promotion_codes", "i", product_count),
+                ("kinds", "B", product_count), ("active", "B", product_count),
+                ("name_offsets", "q", name_count + 1),
+                ("promotion_kinds", "B", promotion_count), ("percents", "d", promotion_count),
+                ("names", "B", names_size))
+    layout = {}
+    offset = _align(_HEADER.size)
+    for section, fmt, count in sections:
+        layout[section] = (offset, fmt, count)
+        offset = _align(offset + struct.calcsize("=" + fmt) * count)
+    return layout, offset
+
+
+def _product_kind(prod):
+    """Return the kind code of the product's type."""
+    try:
+        return PRODUCT_KINDS.index(type(prod))
+    except ValueError:
+        pass
+    raise TypeError(f"Cannot serialize products of type {type(prod).__name__}")
+
+
+def _promotion_kind(promotion):
+    """Return (kind code, percentage) of a promotion."""
+    if type(promotion) is promotions.PercentDiscount:
+        percent = promotion.get_percent()
+        return (2 if isinstance(percent, int) else 3), float(percent)
+    for kind, cls in enumerate(PROMOTION_KINDS[:2]):
+        if type(promotion) is cls:
+            return kind, 0.0
+    raise TypeError(f"Cannot serialize promotions of type {type(promotion).__name__}")
+
+
+def _encode(list_of_products):
+    """Return the header counts, the columns and the tables of the products."""
+    name_codes = {}
+    names = []
+    promotion_codes = {}
+    promotion_table = []
+    columns = {"ids": [], "prices": [], "quantities": [], "maximums": [], "name_codes": [],
+               "promotion_codes": [], "kinds": [], "active": []}
+    for prod in list_of_products:
+        kind = _product_kind(prod)
+        name = prod.get_name()
+        name_code = name_codes.get(name)
+        if name_code is None:
+            name_code = name_codes[name] = len(names)
+            names.append(name.encode())
+        promotion = prod.get_promotion()
+        if promotion is None:
+            promotion_code = -1
+        else:
+            promotion_code = promotion_codes.get(id(promotion))
+            if promotion_code is None:
+                promotion_code = promotion_codes[id(promotion)] = len(promotion_table)
+                promotion_table.append(_promotion_kind(promotion))
+        columns["ids"].append(prod.get_id())
+        columns["prices"].append(prod.get_price())
+        columns["quantities"].append(prod.get_quantity())
+        columns["maximums"].append(prod.get_maximum() if kind == 2 else 0)
+        columns["name_codes"].append(name_code)
+        columns["promotion_codes"].append(promotion_code)
+        columns["kinds"].append(kind)
+        columns["active"].append(prod.is_active())
+
+    offsets = [0]
+    for name in names:
+        offsets.append(offsets[-1] + len(name))
+    columns["name_offsets"] = offsets
+    columns["promotion_kinds"] = [kind for kind, _ in promotion_table]
+    columns["percents"] = [percent for _, percent in promotion_table]
+    columns["names"] = b"".join(names)
+    return (len(columns["ids"]), len(names), len(promotion_table), offsets[-1]), columns
+
+
+def _pack_into(buffer, counts, columns, layout):
+    """Write the header and the columns into the buffer."""
+    _HEADER.pack_into(buffer, 0, MAGIC, *counts)
+    for section, (offset, fmt, count) in layout.items():
+        if section == "names":
+            buffer[offset:offset + count] = columns["names"]
+        elif count:
+            struct.pack_into(f"={count}{fmt}", buffer, offset, *columns[section])
+
+
+def _source_products(source):
+    """Return the product list of a Store, or the given iterable of products as a list."""
+    get_list_of_products = getattr(source, "get_list_of_products", None)
+    return get_list_of_products() if get_list_of_products else list(source)
+
+
+def dumps(source):
+    """Return the products of a Store, or an iterable of products, packed as bytes."""
+    counts, columns = _encode(_source_products(source))
+    layout, size = _layout(*counts)
+    buffer = bytearray(size)
+    _pack_into(buffer, counts, columns, layout)
+    return bytes(buffer)
+
+
+def loads(data):
+    """Return a Store of new products rebuilt from packed data."""
+    catalog = PackedCatalog(data)
+    try:
+        return catalog.to_store()
+    finally:
+        catalog.close()
+
+
+def to_shared_memory(source, name=None):
+    """
+    Pack the products of a Store, or an iterable of products, straight into a new
+    shared memory block and return it. The caller closes and unlinks the block once
+    the receiving processes have attached to it.
+    """
+    # pylint: disable=import-outside-toplevel  # only needed for cross-process handoff
+    from multiprocessing import shared_memory
+    counts, columns = _encode(_source_products(source))
+    layout, size = _layout(*counts)
+    block = shared_memory.SharedMemory(name=name, create=True, size=size)
+    _pack_into(block.buf, counts, columns, layout)
+    return block
+
+
+def attach(name):
+    """
+    Return (shared memory block, PackedCatalog) for a block made by to_shared_memory().
+    Close the catalog before the block.
+    """
+    # pylint: disable=import-outside-toplevel  # only needed for cross-process handoff
+    from multiprocessing import shared_memory
+    block = shared_memory.SharedMemory(name=name)
+    return block, PackedCatalog(block.buf)
+
+
+class PackedCatalog:
+    """Read-only, zero-copy view of packed products, with columns as memoryviews."""
+
+    def __init__(self, buffer):
+        """Map the columns of a packed buffer, without copying them."""
+        view = memoryview(buffer)
+        magic, *counts = _HEADER.unpack_from(view, 0)
+        if magic != MAGIC:
+            raise ValueError("Invalid packed catalog, please provide data made by dumps()")
+        self._views = [view]
+        layout, _ = _layout(*counts)
+        for section, (offset, fmt, count) in layout.items():
+            column = view[offset:offset + struct.calcsize("=" + fmt) * count].cast(fmt)
+            self._views.append(column)
+            setattr(self, section, column)
+        self._names = None
+
+    def __len__(self):
+        """Return the number of products."""
+        return len(self.ids)
+
+    def get_names(self):
+        """Return the distinct product names, decoded once."""
+        if self._names is None:
+            offsets, data = self.name_offsets, self.names
+            self._names = [bytes(data[offsets[code]:offsets[code + 1]]).decode()
+                           for code in range(len(offsets) - 1)]
+        return self._names
+
+    def get_promotions(self):
+        """Return new promotions, one per distinct promotion of the packed products."""
+        table = []
+        for kind, percent in zip(self.promotion_kinds, self.percents):
+            if kind < 2:
+                table.append(PROMOTION_KINDS[kind]())
+            else:
+                table.append(promotions.PercentDiscount(int(percent) if kind == 2 else percent))
+        return table
+
+    def to_products(self):
+        """Return new products rebuilt from the columns, sharing promotions as packed."""
+        return list(self.to_id_map().values())
+
+    def to_id_map(self):
+        """Return {packed product ID: new product} of products rebuilt from the columns."""
+        names = self.get_names()
+        table = self.get_promotions()
+        id_map = {}
+        restore = [cls.restore for cls in PRODUCT_KINDS]
+        for product_id, kind, name_code, price, quantity, maximum, active, promotion_code in zip(
+                self.ids, self.kinds, self.name_codes, self.prices, self.quantities,
+                self.maximums, self.active, self.promotion_codes):
+            promotion = table[promotion_code] if promotion_code >= 0 else None
+            if kind == 2:
+                prod = restore[2](names[name_code], price, quantity, bool(active), promotion,
+                                  maximum)
+            else:
+                prod = restore[kind](names[name_code], price, quantity, bool(active), promotion)
+            id_map[product_id] = prod
+        return id_map
+
+    def to_store(self):
+        """Return a Store of new products rebuilt from the columns, keeping their status."""
+        best_buy = store.Store()
+        for prod in self.to_products():
+            best_buy.add_product(prod)
+        return best_buy
+
+    def close(self):
+        """Release the column views, so that the underlying buffer can be closed."""
+        for column in reversed(self._views):
+            column.release()
+        self._views = []
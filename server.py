@@ -0,0 +1,256 @@
+"""
+Local HTTP/JSON service around a Store.
+
+Endpoints:
+    GET  /products  - active products, streamed as a chunked JSON array
+    GET  /total     - {"quantity": total quantity in store}
+    POST /quote     - {"lines": [{"id": ID, "quantity": N}, ...]} priced without buying
+    POST /order     - {"orders": [{"lines": [...], "idempotency_key": KEY,
+                                   "customer_id": ID}, ...]}
+                      places each order of the batch and returns their totals
+
+The server speaks HTTP/1.1, so clients can keep their connections alive across
+requests, and handles each connection in its own thread. Store calls are
+serialized by a lock; listings are streamed from a catalog snapshot, so the
+lock is not held while writing to the client.
+
+    python -m server [--host 127.0.0.1] [--port 8080] [--catalog CSV]
+"""
+
+
+import contextlib
+import json
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import products
+import store
+
+
+# number of products encoded per chunk of a streamed listing
+LISTING_CHUNK_SIZE = 256
+MAX_BODY_SIZE = 1 << 20
+
+
+def product_record(record):
+    """Return a JSON-ready dict of a snapshots.ProductRecord."""
+    return {"id": record.product_id, "name": record.name, "price": record.price,
+            "quantity": (None if isinstance(record.product, products.NonStockedProduct)
+                         else record.quantity),
+            "promotion": record.promotion}
+
+
+def _is_positive_int(value):
+    """Return True if value is an integer greater than zero (booleans excluded)."""
+    return isinstance(value, int) and not isinstance(value, bool) and value > 0
+
+
+def _check_key(order, field):
+    """Return order[field] if it is missing, a string or an integer, else raise ValueError."""
+    value = order.get(field)
+    if value is not None and (isinstance(value, bool) or not isinstance(value, (str, int))):
+        raise ValueError(f"Invalid {field} {value!r}, please provide a string or an integer")
+    return value
+
+
+def parse_lines(store_p, lines):
+    """Resolve [{"id": ID, "quantity": N}, ...] to (product, quantity) pairs."""
+    if not isinstance(lines, list):
+        raise ValueError("Invalid order lines, please provide a list of {id, quantity} objects")
+    order_list = []
+    for line in lines:
+        if not isinstance(line, dict):
+            raise ValueError("Invalid order line, please provide an {id, quantity} object")
+        product_id, quantity = line.get("id"), line.get("quantity")
+        if not _is_positive_int(product_id) or not _is_positive_int(quantity):
+            raise ValueError(f"Invalid order line {line}, please provide a product ID and "
+                             "a quantity greater than zero")
+        prod = store_p.get_product(product_id)
+        if prod is None or not prod.is_active():
+            raise ValueError(f"Product {product_id} not found in inventory")
+        order_list.append((prod, quantity))
+    return order_list
+
+
+class StoreService:
+    """Thread-safe JSON operations over a Store, as served by the HTTP endpoints."""
+
+    def __init__(self, store_p):
+        """Initialize the service over the given store."""
+        self._store = store_p
+        self._lock = threading.Lock()
+
+    def get_store(self):
+        """Return the served store."""
+        return self._store
+
+    def snapshot(self):
+        """Return a snapshot of the catalog, to be read without holding the lock."""
+        with self._lock:
+            return self._store.snapshot()
+
+    def total(self):
+        """Return the total quantity in store."""
+        with self._lock:
+            return {"quantity": self._store.get_total_quantity()}
+
+    def quote(self, payload):
+        """Return the price of each line and the total, without buying anything."""
+        with self._lock:
+            order_list = parse_lines(self._store, payload.get("lines"))
+            quoted = []
+            for prod, quantity in store.make_compact_order_list(order_list):
+                error = prod.get_purchase_error(quantity)
+                line = {"id": prod.get_id(), "quantity": quantity}
+                if error is None:
+                    line["price"] = prod.get_quote(quantity)
+                else:
+                    line["error"] = error[1]
+                quoted.append(line)
+        return {"lines": quoted, "total": sum(line.get("price", 0.0) for line in quoted)}
+
+    def order(self, payload):
+        """Place each order of a batch and return their totals, or an error per order."""
+        orders = payload.get("orders")
+        if orders is None:
+            orders = [payload]
+        if not isinstance(orders, list):
+            raise ValueError("Invalid orders, please provide a list of orders")
+        results = []
+        with self._lock:
+            for order in orders:
+                try:
+                    if not isinstance(order, dict):
+                        raise ValueError("Invalid order, please provide a {lines} object")
+                    idempotency_key = _check_key(order, "idempotency_key")
+                    customer_id = _check_key(order, "customer_id")
+                    order_list = parse_lines(self._store, order.get("lines"))
+                    # purchase messages are diagnostics, keep them out of the responses
+                    with contextlib.redirect_stdout(sys.stderr):
+                        total = self._store.order(order_list, idempotency_key, customer_id)
+                    results.append({"total": total})
+                except (ValueError, TypeError) as error:
+                    results.append({"error": str(error)})
+        return {"results": results}
+
+
+class StoreRequestHandler(BaseHTTPRequestHandler):
+    """HTTP/1.1 handler of the store endpoints; self.server.service is the StoreService."""
+    protocol_version = "HTTP/1.1"
+    server_version = "BestBuy/2.0"
+    # headers and body go out in separate writes; without TCP_NODELAY every kept-alive
+    # response would stall on the client's delayed ACK
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):  # pylint: disable=redefined-builtin
+        """Keep the access log quiet."""
+
+    def _send_json(self, status, body):
+        """Send body as a JSON response with a Content-Length, keeping the connection open."""
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        if self.close_connection:
+            self.send_header("Connection", "close")
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _send_listing(self):
+        """Stream the active products as a chunked JSON array."""
+        snapshot = self.server.service.snapshot()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        write = self.wfile.write
+        chunk = ["["]
+        count = 0
+        for record in snapshot:
+            if not record.active:
+                continue
+            chunk.append(("," if count else "") + json.dumps(product_record(record)))
+            count += 1
+            if len(chunk) >= LISTING_CHUNK_SIZE:
+                data = "".join(chunk).encode()
+                write(b"%x\r\n%s\r\n" % (len(data), data))
+                chunk = []
+        chunk.append("]")
+        data = "".join(chunk).encode()
+        write(b"%x\r\n%s\r\n0\r\n\r\n" % (len(data), data))
+
+    def _read_json(self):
+        """Return the JSON object of the request body."""
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+        except ValueError:
+            length = -1
+        if length < 0 or length > MAX_BODY_SIZE:
+            # the body is left unread, so the rest of the connection cannot be trusted
+            # to start with a request: close it rather than parse the body as one
+            self.close_connection = True
+            if length > MAX_BODY_SIZE:
+                raise ValueError("Request body too large")
+            raise ValueError("Invalid Content-Length, please provide a length of zero or more")
+        payload = json.loads(self.rfile.read(length) or b"{}")
+        if not isinstance(payload, dict):
+            raise ValueError("Invalid request body, please provide a JSON object")
+        return payload
+
+    def do_GET(self):  # pylint: disable=invalid-name
+        """Serve /products and /total."""
+        if self.path == "/products":
+            self._send_listing()
+        elif self.path == "/total":
+            self._send_json(200, self.server.service.total())
+        else:
+            self._send_json(404, {"error": f"Unknown endpoint {self.path}"})
+
+    def do_POST(self):  # pylint: disable=invalid-name
+        """Serve /quote and /order."""
+        try:
+            payload = self._read_json()
+            if self.path == "/quote":
+                self._send_json(200, self.server.service.quote(payload))
+            elif self.path == "/order":
+                self._send_json(200, self.server.service.order(payload))
+            else:
+                self._send_json(404, {"error": f"Unknown endpoint {self.path}"})
+        except (ValueError, TypeError) as error:
+            self._send_json(400, {"error": str(error)})
+
+
+def make_server(store_p, host="127.0.0.1", port=8080):
+    """Return a threading HTTP server of the store; port 0 picks a free port."""
+    server = ThreadingHTTPServer((host, port), StoreRequestHandler)
+    server.daemon_threads = True
+    server.service = StoreService(store_p)
+    return server
+
+
+def main(argv=None):
+    """Serve the default catalog, or a CSV catalog, until interrupted."""
+    # pylint: disable=import-outside-toplevel
+    import argparse
+    import catalog
+    parser = argparse.ArgumentParser(description="Best Buy store HTTP/JSON service")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--catalog", metavar="CSV",
+                        help="load the products from a CSV catalog instead of the default one")
+    args = parser.parse_args(argv)
+
+    source = catalog.load_catalog() if args.catalog is None else catalog.read_catalog(args.catalog)
+    server = make_server(store.Store(source=source), args.host, args.port)
+    print(f"Serving on http://{server.server_address[0]}:{server.server_address[1]}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
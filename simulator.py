@@ -0,0 +1,261 @@
+"""
+Deterministic order-replay simulator for capacity planning.
+
+Builds a synthetic catalog (a mix of Product, NonStockedProduct and
+LimitedProduct, some with one of the three promotions) and a synthetic order
+stream whose product popularity follows a Zipf law, with periodic bursts in
+which the arrival rate spikes and orders pile onto a few hot products. Both
+are driven by a seed, so a run can be repeated exactly. The stream is then
+replayed through Store.order() as fast as possible, and the simulator reports
+throughput, order latency percentiles, stockouts and memory use over time.
+
+    python -m simulator [--products 10000] [--orders 100000] [--seed 0] [--json]
+"""
+
+
+import bisect
+import contextlib
+from array import array
+import itertools
+import random
+import sys
+import time
+import tracemalloc
+import metrics
+import products
+import promotions
+from store import Store
+
+
+# share of Product, NonStockedProduct and LimitedProduct in a synthetic catalog
+PRODUCT_MIX = (0.8, 0.1, 0.1)
+
+
+def make_catalog(size, seed=0, stock=(10, 1000), mix=PRODUCT_MIX, promoted=0.3):
+    """
+    Return a list of size products of the given type mix, with stock quantities
+    drawn uniformly from the stock range and a share of them on promotion.
+    """
+    rand = random.Random(seed)
+    catalog_promotions = [promotions.SecondHalfPrice(), promotions.ThirdOneFree(),
+                          promotions.PercentDiscount(30)]
+    cum_mix = list(itertools.accumulate(mix))
+    catalog = []
+    for index in range(size):
+        kind = bisect.bisect(cum_mix, rand.random() * cum_mix[-1])
+        price = rand.randint(100, 200000) / 100
+        if kind == 0:
+            prod = products.Product(f"Product {index}", price, rand.randint(*stock))
+        elif kind == 1:
+            prod = products.NonStockedProduct(f"License {index}", price)
+        else:
+            prod = products.LimitedProduct(f"Limited {index}", price, rand.randint(*stock),
+                                           maximum=rand.randint(1, 3))
+        if rand.random() < promoted:
+            prod.set_promotion(rand.choice(catalog_promotions))
+        catalog.append(prod)
+    return catalog
+
+
+def make_order_stream(catalog, orders, seed=0, zipf_s=1.1, max_lines=5, max_quantity=3,
+                      rate=1000.0, burst_every=10.0, burst_length=1.0, burst_factor=10.0,
+                      hot_products=5):
+    """
+    Yield orders of the stream as (arrival time in seconds, shopping list) pairs.
+    Arrivals are Poisson at rate orders per second; for burst_length seconds out of
+    every burst_every, the rate is multiplied by burst_factor and orders are for the
+    hot_products most popular products only.
+    """
+    rand = random.Random(seed)
+    ranked = list(catalog)
+    rand.shuffle(ranked)
+    cum_weights = list(itertools.accumulate(1 / rank ** zipf_s
+                                            for rank in range(1, len(ranked) + 1)))
+    hot = ranked[:hot_products]
+    now = 0.0
+    for _ in range(orders):
+        bursting = now % burst_every < burst_length
+        now += rand.expovariate(rate * burst_factor if bursting else rate)
+        lines = rand.randint(1, max_lines)
+        if bursting:
+            chosen = rand.choices(hot, k=lines)
+        else:
+            chosen = rand.choices(ranked, cum_weights=cum_weights, k=lines)
+        yield now, [(prod, rand.randint(1, max_quantity)) for prod in chosen]
+
+
+class _Discard:
+    """Output stream discarding everything written to it."""
+
+    def write(self, text):
+        """Discard the text."""
+        return len(text)
+
+    def flush(self):
+        """Nothing to flush."""
+
+
+def _rejections():
+    """Return (stockouts, rejected lines) counted so far by the purchase rejection metrics."""
+    stockouts = rejections = 0
+    for counter in metrics.snapshot()["counters"]:
+        if counter["name"] == "store_purchase_rejections_total":
+            rejections += counter["value"]
+            if counter["labels"]["reason"] == products.INSUFFICIENT_STOCK[0]:
+                stockouts += counter["value"]
+    return stockouts, rejections
+
+
+def percentile(sorted_values, fraction):
+    """Return the value at the given fraction of the sorted values."""
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+
+def replay(store_p, stream, sample_every=1000, trace_memory=True, expected_orders=None):
+    """
+    Place every order of the stream on the store and return a report of throughput,
+    latency percentiles (in milliseconds), stockouts and a timeline sampled every
+    sample_every orders. Memory is traced with tracemalloc when trace_memory is
+    True, which slows down the replay itself; if tracing was started before the
+    store was built, as simulate() does, the memory includes its starting footprint.
+    Latencies go to an array preallocated for len(stream) or expected_orders orders,
+    whose buffer is left out of the memory figures. Rejections are read from the
+    metrics counters, which are enabled without timing for the replay if they were
+    disabled.
+    """
+    was_enabled = metrics.is_enabled()
+    if not was_enabled:
+        metrics.enable(timing=False)
+    baseline = _rejections()
+    size = len(stream) if hasattr(stream, "__len__") else expected_orders
+    latencies = array("d", bytes(8 * (size or 0)))
+    count = 0
+    timeline = []
+    lines = 0
+    revenue = 0.0
+    arrival = 0.0
+    clock = time.perf_counter
+    start_tracing = trace_memory and not tracemalloc.is_tracing()
+    if start_tracing:
+        tracemalloc.start()
+    start_memory = _sample(store_p, 0, 0.0, 0.0, baseline, trace_memory, latencies)
+    started = clock()
+    try:
+        # purchase messages are diagnostics, keep them out of the report
+        with contextlib.redirect_stdout(_Discard()):
+            for count, (arrival, shopping_list) in enumerate(stream, 1):
+                start = clock()
+                revenue += store_p.order(shopping_list)
+                if count <= len(latencies):
+                    latencies[count - 1] = clock() - start
+                else:
+                    latencies.append(clock() - start)
+                lines += len(shopping_list)
+                if count % sample_every == 0:
+                    timeline.append(_sample(store_p, count, clock() - started, arrival,
+                                            baseline, trace_memory, latencies))
+        elapsed = clock() - started
+        final = _sample(store_p, count, elapsed, arrival, baseline, trace_memory, latencies)
+    finally:
+        if start_tracing:
+            tracemalloc.stop()
+        if not was_enabled:
+            metrics.disable()
+    if not timeline or timeline[-1]["orders"] != final["orders"]:
+        timeline.append(final)
+
+    latencies = sorted(latencies[:count])
+    return {"orders": count, "lines": lines, "revenue": revenue,
+            "elapsed_s": elapsed, "simulated_s": arrival,
+            "throughput_per_s": count / elapsed if elapsed else 0.0,
+            "offered_per_s": count / arrival if arrival else 0.0,
+            "latency_ms": {name: percentile(latencies, fraction) * 1e3
+                           for name, fraction in (("p50", 0.5), ("p90", 0.9),
+                                                  ("p99", 0.99), ("max", 1.0))},
+            "rejected_lines": final["rejected_lines"], "stockouts": final["stockouts"],
+            "sold_out_products": final["sold_out_products"],
+            "start_memory_bytes": start_memory["memory_bytes"],
+            "peak_memory_bytes": max((sample["peak_memory_bytes"] for sample in timeline),
+                                     default=0),
+            "timeline": timeline}
+
+
+def _sample(store_p, orders, elapsed, arrival, baseline, trace_memory, latencies):
+    """
+    Return a timeline sample of the replay after the given number of orders, with
+    the rejections counted since the baseline (stockouts, rejected lines) and the
+    traced memory less the buffer of the latency array.
+    """
+    current, peak = tracemalloc.get_traced_memory() if trace_memory else (0, 0)
+    if trace_memory:
+        own = len(latencies) * latencies.itemsize
+        current, peak = max(current - own, 0), max(peak - own, 0)
+    stockouts, rejections = _rejections()
+    return {"orders": orders, "elapsed_s": elapsed, "simulated_s": arrival,
+            "stockouts": stockouts - baseline[0], "rejected_lines": rejections - baseline[1],
+            "sold_out_products": store_p.get_sold_out_count(),
+            "memory_bytes": current, "peak_memory_bytes": peak}
+
+
+def simulate(catalog_size=10000, orders=100000, seed=0, sample_every=10000, trace_memory=True,
+             **stream_options):
+    """
+    Build a catalog and an order stream from the seed, replay them and return the
+    report. Memory is traced from before the catalog is built, so it includes the store.
+    """
+    start_tracing = trace_memory and not tracemalloc.is_tracing()
+    if start_tracing:
+        tracemalloc.start()
+    try:
+        catalog = make_catalog(catalog_size, seed)
+        stream = make_order_stream(catalog, orders, seed, **stream_options)
+        return replay(Store(catalog), stream, sample_every, trace_memory, orders)
+    finally:
+        if start_tracing:
+            tracemalloc.stop()
+
+
+def main(argv=None):
+    """Run a simulation and print its report."""
+    # pylint: disable=import-outside-toplevel
+    import argparse
+    import json
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--products", type=int, default=10000)
+    parser.add_argument("--orders", type=int, default=100000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--zipf", type=float, default=1.1, help="Zipf exponent of popularity")
+    parser.add_argument("--rate", type=float, default=1000.0, help="orders per second")
+    parser.add_argument("--burst-factor", type=float, default=10.0)
+    parser.add_argument("--sample-every", type=int, default=10000)
+    parser.add_argument("--no-memory", action="store_true", help="do not trace memory")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args(argv)
+
+    report = simulate(args.products, args.orders, args.seed, args.sample_every,
+                      not args.no_memory, zipf_s=args.zipf, rate=args.rate,
+                      burst_factor=args.burst_factor)
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return 0
+    latency = report["latency_ms"]
+    print(f"{report['orders']} orders ({report['lines']} lines) in {report['elapsed_s']:.2f} s: "
+          f"{report['throughput_per_s']:.0f} orders/s "
+          f"(offered {report['offered_per_s']:.0f} orders/s)")
+    print(f"latency p50 {latency['p50']:.3f} ms, p90 {latency['p90']:.3f} ms, "
+          f"p99 {latency['p99']:.3f} ms, max {latency['max']:.3f} ms")
+    print(f"{report['stockouts']} stockouts, {report['rejected_lines']} rejected lines, "
+          f"{report['sold_out_products']} sold-out products")
+    print(f"memory {report['start_memory_bytes'] / 1024:.0f} KiB at start, "
+          f"peak {report['peak_memory_bytes'] / 1024:.0f} KiB")
+    print(f"{'orders':>10}{'elapsed s':>12}{'stockouts':>11}{'sold out':>10}{'memory KiB':>12}")
+    for sample in report["timeline"]:
+        print(f"{sample['orders']:>10}{sample['elapsed_s']:>12.2f}{sample['stockouts']:>11}"
+              f"{sample['sold_out_products']:>10}{sample['memory_bytes'] / 1024:>12.0f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,176 @@
+"""
+Copy-on-write catalog snapshots.
+
+PersistentVector is an immutable 32-way trie (as used by Clojure's vectors):
+appending or replacing an element copies only the O(log32 n) nodes on the path
+to it and shares everything else with the previous version. A Store keeps its
+product records in such a vector once Store.snapshot() has been called, so a
+snapshot is just a reference to the current version: taking one is O(1), it
+never changes afterwards, and readers need no locks while orders keep
+mutating the store.
+"""
+
+
+from collections import namedtuple
+
+
+BITS = 5
+WIDTH = 1 << BITS
+MASK = WIDTH - 1
+
+
+ProductRecord = namedtuple("ProductRecord", ["product_id", "name", "price", "quantity",
+                                             "active", "promotion", "product"])
+
+
+def make_record(prod):
+    """Return an immutable record of the product's current state."""
+    promotion = prod.get_promotion()
+    return ProductRecord(prod.get_id(), prod.get_name(), prod.get_price(), prod.get_quantity(),
+                         prod.is_active(), promotion.get_name() if promotion else None, prod)
+
+
+def _new_path(level, node):
+    """Return node wrapped in single-child branches down from the given level."""
+    for _ in range(0, level, BITS):
+        node = (node,)
+    return node
+
+
+def _push_tail(count, level, parent, tail):
+    """Return a copy of the parent branch with the full tail added as its last leaf."""
+    sub_index = ((count - 1) >> level) & MASK
+    if level == BITS:
+        child = tail
+    elif sub_index < len(parent):
+        child = _push_tail(count, level - BITS, parent[sub_index], tail)
+    else:
+        child = _new_path(level - BITS, tail)
+    return parent[:sub_index] + (child,) + parent[sub_index + 1:]
+
+
+def _set_in(level, node, index, value):
+    """Return a copy of the path to index with value stored at index."""
+    sub_index = (index >> level) & MASK
+    if level == 0:
+        return node[:sub_index] + (value,) + node[sub_index + 1:]
+    child = _set_in(level - BITS, node[sub_index], index, value)
+    return node[:sub_index] + (child,) + node[sub_index + 1:]
+
+
+def _leaves(level, node):
+    """Yield the elements below node, in order."""
+    if level == 0:
+        yield from node
+    else:
+        for child in node:
+            yield from _leaves(level - BITS, child)
+
+
+class PersistentVector:
+    """Immutable sequence with O(log32 n) append and replace by structural sharing."""
+    __slots__ = ("_count", "_shift", "_root", "_tail")
+
+    def __init__(self, count=0, shift=BITS, root=(), tail=()):
+        """Initialize a vector from its trie parts; use from_iterable() to build one."""
+        self._count = count
+        self._shift = shift
+        self._root = root
+        self._tail = tail
+
+    @classmethod
+    def from_iterable(cls, items):
+        """Return a vector of the items, built bottom-up in O(n)."""
+        items = list(items)
+        count = len(items)
+        tail_offset = ((count - 1) >> BITS) << BITS if count else 0
+        nodes = [tuple(items[start:start + WIDTH]) for start in range(0, tail_offset, WIDTH)]
+        shift = BITS
+        while len(nodes) > WIDTH:
+            nodes = [tuple(nodes[start:start + WIDTH]) for start in range(0, len(nodes), WIDTH)]
+            shift += BITS
+        return cls(count, shift, tuple(nodes), tuple(items[tail_offset:]))
+
+    def _tail_offset(self):
+        """Return the index of the first element held in the tail."""
+        return ((self._count - 1) >> BITS) << BITS if self._count else 0
+
+    def __len__(self):
+        """Return the number of elements."""
+        return self._count
+
+    def __getitem__(self, index):
+        """Return the element at index."""
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError("Index out of range")
+        if index >= self._tail_offset():
+            return self._tail[index & MASK]
+        node = self._root
+        for level in range(self._shift, 0, -BITS):
+            node = node[(index >> level) & MASK]
+        return node[index & MASK]
+
+    def __iter__(self):
+        """Iterate over the elements in order."""
+        yield from _leaves(self._shift, self._root)
+        yield from self._tail
+
+    def append(self, value):
+        """Return a new vector with value added at the end."""
+        count = self._count
+        if count - self._tail_offset() < WIDTH:
+            return PersistentVector(count + 1, self._shift, self._root, self._tail + (value,))
+        shift = self._shift
+        if (count >> BITS) > (1 << shift):
+            root = (self._root, _new_path(shift, self._tail))
+            shift += BITS
+        else:
+            root = _push_tail(count, shift, self._root, self._tail)
+        return PersistentVector(count + 1, shift, root, (value,))
+
+    def set(self, index, value):
+        """Return a new vector with the element at index replaced by value."""
+        if not 0 <= index < self._count:
+            raise IndexError("Index out of range")
+        if index >= self._tail_offset():
+            position = index & MASK
+            tail = self._tail[:position] + (value,) + self._tail[position + 1:]
+            return PersistentVector(self._count, self._shift, self._root, tail)
+        root = _set_in(self._shift, self._root, index, value)
+        return PersistentVector(self._count, self._shift, root, self._tail)
+
+
+class CatalogSnapshot:
+    """Immutable, point-in-time view of a store's product records."""
+    __slots__ = ("_version", "_records")
+
+    def __init__(self, version, records):
+        """Initialize a snapshot of the given version over a PersistentVector of records."""
+        self._version = version
+        self._records = records
+
+    def get_version(self):
+        """Return the catalog version this snapshot was taken at."""
+        return self._version
+
+    def __len__(self):
+        """Return the number of product records."""
+        return len(self._records)
+
+    def __iter__(self):
+        """Iterate over the product records in store order."""
+        return iter(self._records)
+
+    def __getitem__(self, index):
+        """Return the product record at the store position index."""
+        return self._records[index]
+
+    def get_all_products(self):
+        """Return the records of the products that were active."""
+        return [record for record in self._records if record.active]
+
+    def get_total_quantity(self):
+        """Return the total quantity in stock at the time of the snapshot."""
+        return sum(record.quantity for record in self._records)
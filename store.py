@@ -6,9 +6,19 @@ as well as tracking inventory.
 """
 
 
+import sys
+# the low-level thread module keeps threading off the startup path
+import _thread
+import metrics
 import products
 
 
+# sold-out products are compacted away once they make up this share of the product list
+COMPACT_RATIO = 0.5
+# ... but never for lists shorter than this
+COMPACT_MIN_SIZE = 1024
+
+
 def make_compact_order_list(shopping_list):
     """Combine duplicate items in the shopping list by summing their quantities."""
     # get the unique elements in the list
@@ -26,32 +36,102 @@ def make_compact_order_list(shopping_list):
     return new_list
 
 
+def _is_count(value):
+    """Return True if value is a non-negative integer (booleans excluded)."""
+    return isinstance(value, int) and not isinstance(value, bool) and value >= 0
+
+
+def _is_price(value):
+    """Return True if value is a finite, non-negative real number (booleans excluded)."""
+    return (isinstance(value, (int, float)) and not isinstance(value, bool)
+            and 0 <= value < float("inf"))
+
+
+def render_listing(numbered_products, stream=None):
+    """Write a listing of (number, product) pairs as show() lines in a single buffered write."""
+    if stream is None:
+        stream = sys.stdout
+    stream.write("".join([f"{number}. {prod.show()}\n" for number, prod in numbered_products]))
+
+
 class Store:
     """Store that holds and manages multiple products."""
-    def __init__(self, list_of_products=None):
-        """Initialize store with a list of products."""
+    def __init__(self, list_of_products=None, source=None):
+        """
+        Initialize store with a list of products. Products of an optional catalog
+        source (any iterable of products) are only materialized on first access.
+        """
         self._list_of_products = []
+        self._products_by_id = {}
+        # sold-out products are kept in the list as inactive tombstones until compaction,
+        # and compacted ones stay known by ID so that restocking can revive them
+        self._tombstones = set()
+        self._compacted = set()
+        # copy-on-write records for snapshots, maintained once the first one is taken
+        self._records = None
+        self._record_positions = {}
+        self._records_version = 0
+        self._source = None
+        self._profiler = None
+        self._ledger = None
+        self._idempotency_cache = None
+        self._idempotency_lock = _thread.allocate_lock()
+        self._router = None
+        self._customer_limits = None
+        # bumped whenever products are added or removed, to invalidate the report columns
+        self._version = 0
+        self._columns = None
+        self._columns_version = None
         if isinstance(list_of_products, list) and list_of_products is not None:
             for prod in list_of_products:
                 prod.activate()
                 self.add_product(prod)
+        self._source = source
+
+    def _materialize(self):
+        """Add the products of a pending catalog source to the store."""
+        if self._source is not None:
+            source, self._source = self._source, None
+            for prod in source:
+                prod.activate()
+                self.add_product(prod)
 
     def add_product(self, prod):
         """Add a Product to the store."""
+        self._materialize()
         if isinstance(prod, products.Product):
             self._list_of_products.append(prod)
+            self._products_by_id[prod.get_id()] = prod
+            self._compacted.discard(prod.get_id())
+            if self._is_tombstone(prod):
+                self._tombstones.add(prod.get_id())
+            self._version += 1
+            self._append_record(prod)
         else:
             raise TypeError("Only Product instances can be added to the store")
 
     def remove_product(self, prod):
         """Remove a Product from the store."""
+        self._materialize()
+        if isinstance(prod, products.Product) and prod.get_id() in self._compacted:
+            self._compacted.discard(prod.get_id())
+            del self._products_by_id[prod.get_id()]
+            return
         try:
             self._list_of_products.remove(prod)
         except ValueError:
             print("Product not found in inventory")
+            return
+        self._version += 1
+        if self._records is not None:
+            self._rebuild_records()
+        if prod not in self._list_of_products:
+            del self._products_by_id[prod.get_id()]
+            self._tombstones.discard(prod.get_id())
 
     def get_total_quantity(self):
         """Return the total number of products."""
+        self._materialize()
         total_quantity = 0
         for prod in self._list_of_products:
             total_quantity += prod.get_quantity()
@@ -59,23 +139,368 @@ class Store:
 
     def get_all_products(self):
         """Return a list of active products."""
+        self._materialize()
         active_products = []
         for prod in self._list_of_products:
             if prod.is_active():
                 active_products.append(prod)
         return active_products
 
+    def _is_tombstone(self, prod):
+        """Return True if the product is a sold-out, inactive stocked product."""
+        return (prod.get_quantity() == 0 and not prod.is_active()
+                and not isinstance(prod, products.NonStockedProduct))
+
+    def get_tombstone_count(self):
+        """Return the number of sold-out products kept in the product list."""
+        return len(self._tombstones)
+
+    def get_sold_out_count(self):
+        """Return the number of sold-out products, compacted ones included."""
+        return len(self._tombstones) + len(self._compacted)
+
+    def _track_tombstone(self, prod):
+        """Record whether a product whose stock or status changed is now a tombstone."""
+        product_id = prod.get_id()
+        if self._is_tombstone(prod):
+            if product_id not in self._compacted:
+                self._tombstones.add(product_id)
+        else:
+            self._tombstones.discard(product_id)
+            if product_id in self._compacted:
+                self._revive(prod)
+
+    def compact(self):
+        """
+        Drop sold-out products from the product list in one pass and return how many
+        were dropped. They stay known by ID, so restocking through apply_updates()
+        revives them. Listing cursors issued before compaction are invalidated.
+        """
+        self._materialize()
+        kept = []
+        for prod in self._list_of_products:
+            if self._is_tombstone(prod):
+                self._compacted.add(prod.get_id())
+            else:
+                kept.append(prod)
+        dropped = len(self._list_of_products) - len(kept)
+        self._list_of_products[:] = kept
+        self._tombstones.clear()
+        if dropped:
+            self._version += 1
+            if self._records is not None:
+                self._rebuild_records()
+        return dropped
+
+    def _revive(self, prod):
+        """Bring a restocked, compacted product back into the product list, in O(1)."""
+        self._compacted.discard(prod.get_id())
+        self._list_of_products.append(prod)
+        self._version += 1
+        self._append_record(prod)
+
+    def get_product(self, product_id):
+        """Return the product with the given ID, or None if it is not in the store."""
+        self._materialize()
+        return self._products_by_id.get(product_id)
+
+    def has_product(self, prod):
+        """Return True if the product is in the store, using an O(1) ID lookup."""
+        self._materialize()
+        return (isinstance(prod, products.Product)
+                and self._products_by_id.get(prod.get_id()) is prod)
+
     def get_list_of_products(self):
         """Return the store's list of products."""
+        self._materialize()
         return self._list_of_products
 
-    def order(self, shopping_list):
-        """ Process a list of (Product, quantity) purchases and return total cost."""
+    def iter_products(self, cursor=0, predicate=None, active_only=True):
+        """
+        Lazily yield (next_cursor, product) pairs starting at the given cursor.
+        Products are filtered by active status and by an optional predicate.
+        """
+        self._materialize()
+        position = cursor
+        while position < len(self._list_of_products):
+            prod = self._list_of_products[position]
+            position += 1
+            if active_only and not prod.is_active():
+                continue
+            if predicate is not None and not predicate(prod):
+                continue
+            yield position, prod
+
+    def get_products_page(self, cursor=0, page_size=10, predicate=None, active_only=True):
+        """
+        Return a page of at most page_size products and the cursor of the next page.
+        The returned cursor is None when there are no more matching products.
+        """
+        if isinstance(page_size, bool) or not isinstance(page_size, int) or page_size <= 0:
+            raise ValueError("Invalid page size, please provide a number greater than zero")
+        if isinstance(cursor, bool) or not isinstance(cursor, int) or cursor < 0:
+            raise ValueError("Invalid cursor, please provide a number greater or equal to zero")
+        page = []
+        next_cursor = cursor
+        for position, prod in self.iter_products(cursor, predicate, active_only):
+            if len(page) == page_size:
+                return page, next_cursor
+            page.append(prod)
+            next_cursor = position
+        return page, None
+
+    def apply_updates(self, updates):
+        """
+        Apply (product ID, quantity, price, active) records, where None keeps the
+        current value, and return the number of products updated. All records are
+        validated before any is applied, so an invalid record leaves the store
+        unchanged. Products restocked from zero are reactivated.
+        """
+        self._materialize()
+        resolved = []
+        for index, (product_id, quantity, price, active) in enumerate(updates):
+            prod = self._products_by_id.get(product_id)
+            if prod is None:
+                raise ValueError(f"Invalid update #{index}: product {product_id} "
+                                 f"not found in inventory")
+            if quantity is not None and not _is_count(quantity):
+                raise ValueError(f"Invalid update #{index}: invalid quantity {quantity!r}")
+            if (quantity is not None and self._router is not None
+                    and self._router.has_locations(prod)):
+                raise ValueError(f"Invalid update #{index}: product {product_id} is stocked "
+                                 f"by location, please use set_location_stock()")
+            if price is not None and not _is_price(price):
+                raise ValueError(f"Invalid update #{index}: invalid price {price!r}")
+            if active is not None and not isinstance(active, bool):
+                raise ValueError(f"Invalid update #{index}: invalid active flag {active!r}")
+            resolved.append((prod, quantity, price, active))
+
+        for prod, quantity, price, active in resolved:
+            prod.apply_update(quantity, price, active)
+            self._track_tombstone(prod)
+        return len(resolved)
+
+    def set_low_stock_alerts(self, thresholds, subscribers):
+        """
+        Register low-water marks for many products at once. thresholds is either a
+        single mark for every stocked product or a {product ID: mark} mapping, and
+        the subscribers are called with (product, quantity) when a mark is crossed.
+        A mapping is validated before any mark is set, so an invalid entry leaves
+        the store unchanged.
+        """
+        self._materialize()
+        subscribers = tuple(subscribers)
+        if isinstance(thresholds, dict):
+            resolved = []
+            for product_id, threshold in thresholds.items():
+                prod = self._products_by_id.get(product_id)
+                if prod is None:
+                    raise ValueError(f"Product {product_id} not found in inventory")
+                if isinstance(prod, products.NonStockedProduct):
+                    raise ValueError(f"Invalid low stock alert: product {product_id} "
+                                     f"is not stocked")
+                resolved.append((prod, products.parse_low_stock_threshold(threshold)))
+            for prod, threshold in resolved:
+                prod.set_low_stock_alert(threshold, subscribers)
+        else:
+            for prod in self._products_by_id.values():
+                if not isinstance(prod, products.NonStockedProduct):
+                    prod.set_low_stock_alert(thresholds, subscribers)
+
+    def _get_columns(self):
+        """Return the reporting columns of the products, rebuilt or patched as needed."""
+        # pylint: disable=import-outside-toplevel  # NumPy is only loaded for reports
+        import reporting
+        self._materialize()
+        if self._columns is None or self._columns_version != self._version:
+            if self._columns is not None:
+                self._columns.close()
+            self._columns = reporting.InventoryColumns(self._list_of_products)
+            self._columns_version = self._version
+        else:
+            self._columns.refresh()
+        return self._columns
+
+    def get_inventory_report(self, active_only=False):
+        """
+        Return the stock value at list price, the stock value after the current
+        promotions and the stock value by product type, computed in one vectorized
+        pass over columns cached between changes.
+        """
+        import reporting  # pylint: disable=import-outside-toplevel
+        return reporting.inventory_report(self._get_columns(), active_only)
+
+    def get_stock_value(self, active_only=False):
+        """Return the value of the stock at list price."""
+        import reporting  # pylint: disable=import-outside-toplevel
+        columns = self._get_columns()
+        return reporting.stock_value(columns, columns.active if active_only else None)
+
+    def get_promoted_stock_value(self, active_only=False):
+        """Return the value of the stock if it were all sold under the current promotions."""
+        import reporting  # pylint: disable=import-outside-toplevel
+        columns = self._get_columns()
+        return reporting.promoted_stock_value(columns, columns.active if active_only else None)
+
+    def snapshot(self):
+        """
+        Return an immutable, consistent view of the products' records at this point in
+        time. The first call builds the records in O(n); after that every change copies
+        only O(log n) shared nodes and taking a snapshot is O(1), with no copying.
+        """
+        # pylint: disable=import-outside-toplevel  # only loaded once snapshots are used
+        import snapshots
+        self._materialize()
+        if self._records is None:
+            self._rebuild_records()
+            products.watch_changes(self)
+        return snapshots.CatalogSnapshot(self._records_version, self._records)
+
+    def _rebuild_records(self):
+        """Rebuild the snapshot records from the product list."""
+        import snapshots  # pylint: disable=import-outside-toplevel
+        self._records = snapshots.PersistentVector.from_iterable(
+            snapshots.make_record(prod) for prod in self._list_of_products)
+        self._record_positions = {prod.get_id(): position
+                                  for position, prod in enumerate(self._list_of_products)}
+        self._records_version += 1
+
+    def _append_record(self, prod):
+        """Add the record of a product appended to the product list."""
+        if self._records is not None:
+            import snapshots  # pylint: disable=import-outside-toplevel
+            self._record_positions[prod.get_id()] = len(self._records)
+            self._records = self._records.append(snapshots.make_record(prod))
+            self._records_version += 1
+
+    def product_changed(self, prod):
+        """Replace the snapshot record of a product of this store that changed."""
+        position = self._record_positions.get(prod.get_id())
+        if position is not None and self._records is not None:
+            import snapshots  # pylint: disable=import-outside-toplevel
+            self._records = self._records.set(position, snapshots.make_record(prod))
+            self._records_version += 1
+
+    def set_profiler(self, profiler):
+        """Attach a profiling.OrderProfiler that captures sampled orders, or None to detach."""
+        self._profiler = profiler
+
+    def get_profiler(self):
+        """Return the attached order profiler, if any."""
+        return self._profiler
+
+    def set_ledger(self, ledger):
+        """Attach a ledger.SalesLedger that records committed order lines, or None to detach."""
+        self._ledger = ledger
+
+    def get_ledger(self):
+        """Return the attached sales ledger, if any."""
+        return self._ledger
+
+    def set_router(self, router):
+        """Take the units of products stocked by location through a warehouses.FulfillmentRouter."""
+        self._router = router
+
+    def get_router(self):
+        """Return the fulfillment router of the store, or None if there is none."""
+        return self._router
+
+    def set_location_stock(self, product_id, location, quantity):
+        """Set the quantity of a product at a location through the store's router."""
+        self._materialize()
+        if self._router is None:
+            raise ValueError("Invalid operation, please set a fulfillment router first")
+        prod = self._products_by_id.get(product_id)
+        if prod is None:
+            raise ValueError(f"Product {product_id} not found in inventory")
+        self._router.set_stock(prod, location, quantity)
+        self._track_tombstone(prod)
+
+    def set_customer_limits(self, limits):
+        """Enforce the per-customer limits of a customer_limits.CustomerLimits on orders."""
+        self._customer_limits = limits
+
+    def get_customer_limits(self):
+        """Return the per-customer limits of the store, or None if there are none."""
+        return self._customer_limits
+
+    def set_idempotency_cache(self, cache):
+        """Use the given idempotency.IdempotencyCache for orders placed with a key."""
+        self._idempotency_cache = cache
+
+    def get_idempotency_cache(self):
+        """Return the idempotency cache, creating one with default limits if needed."""
+        if self._idempotency_cache is None:
+            import idempotency  # pylint: disable=import-outside-toplevel
+            # concurrent first keyed orders must share one cache, or both would buy
+            with self._idempotency_lock:
+                if self._idempotency_cache is None:
+                    self._idempotency_cache = idempotency.IdempotencyCache()
+        return self._idempotency_cache
+
+    @metrics.timed("store_order_seconds")
+    def order(self, shopping_list, idempotency_key=None, customer_id=None):
+        """
+        Process a list of (Product, quantity) purchases and return total cost.
+        Repeating an order with the same idempotency key returns the first result
+        instead of buying again. Orders placed for a customer ID are held to the
+        store's per-customer limits.
+        """
+        if idempotency_key is not None:
+            return self.get_idempotency_cache().run(idempotency_key, self._place_order,
+                                                    shopping_list, customer_id)
+        return self._place_order(shopping_list, customer_id)
+
+    def _place_order(self, shopping_list, customer_id=None):
+        """Process an order, capturing a profile of it if it is sampled."""
+        if self._profiler is not None and self._profiler.should_capture(shopping_list):
+            return self._profiler.capture(
+                lambda shopping_list: self._order(shopping_list, customer_id), shopping_list)
+        return self._order(shopping_list, customer_id)
+
+    def _order(self, shopping_list, customer_id=None):
+        """Process the purchases of an order and return its total cost."""
+        self._materialize()
         total_price = 0
         compact_list = make_compact_order_list(shopping_list)
+        limits = self._customer_limits if customer_id is not None else None
+        if metrics.ENABLED:
+            metrics.inc("store_orders_total")
+            metrics.inc("store_order_lines_total", amount=len(compact_list))
         for prod, quantity in compact_list:
-            if prod in self._list_of_products:
-                total_price += prod.buy(quantity)
-                if prod.get_quantity() == 0 and not isinstance(prod, products.NonStockedProduct):
-                    self.remove_product(prod)
+            if not self.has_product(prod):
+                if metrics.ENABLED:
+                    metrics.inc("store_purchase_rejections_total", (("reason", "not_in_store"),))
+                continue
+            if limits is not None:
+                error = limits.get_purchase_error(customer_id, prod, quantity)
+                if error is not None:
+                    if metrics.ENABLED:
+                        metrics.inc("store_purchase_rejections_total", (("reason", error[0]),))
+                    print(error[1])
+                    continue
+            if self._router is not None:
+                # checked before buying, so that a line is never sold without its units
+                error = self._router.get_purchase_error(prod, quantity)
+                if error is not None:
+                    if metrics.ENABLED:
+                        metrics.inc("store_purchase_rejections_total", (("reason", error[0]),))
+                    print(error[1])
+                    continue
+            price = prod.try_buy(quantity)
+            if price is None:
+                continue
+            total_price += price
+            if limits is not None:
+                limits.record(customer_id, prod, quantity)
+            if self._ledger is not None:
+                self._ledger.record(prod, quantity, price)
+            if self._router is not None and self._router.has_locations(prod):
+                self._router.fulfill(prod, quantity)
+            if prod.get_quantity() == 0:
+                # keep the sold-out product in place as an inactive tombstone
+                self._track_tombstone(prod)
+        if (len(self._list_of_products) >= COMPACT_MIN_SIZE
+                and len(self._tombstones) > COMPACT_RATIO * len(self._list_of_products)):
+            self.compact()
         return total_price
@@ -0,0 +1,122 @@
+"""
+Unit tests for the Cart and CartPricer classes using pytest.
+"""
+
+
+import pytest
+import promotions
+from carts import CartPricer
+from products import Product
+from store import Store
+
+
+@pytest.fixture(name="pricer")
+def fixture_pricer():
+    """Return a pricer recording its notifications, closed after the test."""
+    notifications = []
+    pricer = CartPricer([lambda cart, previous: notifications.append(
+        (cart.get_id(), previous, cart.get_total()))])
+    pricer.notifications = notifications
+    yield pricer
+    pricer.close()
+
+
+def test_cart_lines(pricer):
+    """Test cart lines are priced with the current promotions and can be removed."""
+    mac = Product("MacBook Air M2", price=1450, quantity=100)
+    mac.set_promotion(promotions.SecondHalfPrice())
+    bose = Product("Bose QuietComfort Earbuds", price=250, quantity=500)
+    cart = pricer.open_cart()
+    cart.set_line(mac, 2)
+    cart.set_line(bose, 1)
+    assert cart.get_line_price(mac) == 2175.0
+    assert cart.get_total() == 2425.0
+    cart.set_line(mac, 0)
+    assert cart.get_total() == 250.0
+    assert pricer.get_carts(mac) == []
+    with pytest.raises(ValueError):
+        cart.set_line(bose, -1)
+
+
+def test_promotion_change_reprices_affected_carts(pricer):
+    """Test only the carts containing a re-promoted product are repriced and notified."""
+    mac = Product("MacBook Air M2", price=1450, quantity=100)
+    bose = Product("Bose QuietComfort Earbuds", price=250, quantity=500)
+    with_mac = pricer.open_cart()
+    with_mac.set_line(mac, 3)
+    with_mac.set_line(bose, 1)
+    without_mac = pricer.open_cart()
+    without_mac.set_line(bose, 2)
+
+    third_free = promotions.ThirdOneFree()
+    mac.set_promotion(third_free)
+    assert with_mac.get_total() == 3150.0
+    assert pricer.notifications == [(with_mac.get_id(), 4600.0, 3150.0)]
+    assert pricer.get_products(third_free) == {mac.get_id()}
+
+    mac.remove_promotion()
+    assert with_mac.get_total() == 4600.0
+    assert pricer.get_products(third_free) == set()
+    assert without_mac.get_total() == 500.0
+    assert len(pricer.notifications) == 2
+
+
+def test_stock_changes_do_not_reprice(pricer):
+    """Test buying, which changes only the quantity, reprices nothing."""
+    mac = Product("MacBook Air M2", price=1450, quantity=100)
+    cart = pricer.open_cart()
+    cart.set_line(mac, 2)
+    best_buy = Store([mac])
+    assert best_buy.order(cart.get_shopping_list()) == 2900.0
+    assert pricer.notifications == []
+    mac.set_price(1000)
+    assert cart.get_total() == 2000.0
+    assert len(pricer.notifications) == 1
+
+
+def test_promotion_terms_change_and_close(pricer):
+    """Test promotion_changed() reprices every cart with its products, and closing carts."""
+    discount = promotions.PercentDiscount(10)
+    mac = Product("MacBook Air M2", price=1000, quantity=100)
+    mac.set_promotion(discount)
+    carts = [pricer.open_cart() for _ in range(3)]
+    for cart in carts:
+        cart.set_line(mac, 1)
+    discount._percent = 50  # pylint: disable=protected-access
+    pricer.promotion_changed(discount)
+    assert [cart.get_total() for cart in carts] == [500.0] * 3
+    assert len(pricer.notifications) == 3
+
+    for cart in carts:
+        cart.close()
+    assert pricer.get_cart_count() == 0
+    assert pricer.get_products(discount) == set()
+
+
+def test_subscriber_closes_carts():
+    """Test a subscriber may close carts while they are repriced."""
+    mac = Product("MacBook Air M2", price=1000, quantity=100)
+    carts = []
+    pricer = CartPricer([lambda cart, previous: [other.close() for other in carts]])
+    try:
+        carts.extend(pricer.open_cart() for _ in range(3))
+        for cart in carts:
+            cart.set_line(mac, 1)
+        mac.set_price(500)
+        assert pricer.get_cart_count() == 0
+        assert pricer.get_carts(mac) == []
+    finally:
+        pricer.close()
+
+
+def test_closed_cart_rejects_lines(pricer):
+    """Test lines cannot be set once a cart is closed."""
+    mac = Product("MacBook Air M2", price=1000, quantity=100)
+    cart = pricer.open_cart()
+    cart.set_line(mac, 1)
+    cart.close()
+    assert cart.is_closed()
+    with pytest.raises(ValueError, match="open cart"):
+        cart.set_line(mac, 2)
+    assert pricer.get_carts(mac) == []
+    assert cart.get_total() == 0.0
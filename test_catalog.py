@@ -0,0 +1,57 @@
+"""
+Unit tests for the catalog module using pytest.
+"""
+
+
+import pytest
+import catalog
+from products import Product, NonStockedProduct, LimitedProduct
+from store import Store
+
+
+# ---------- Promotions ----------
+def test_get_promotion():
+    """Test promotions are created on demand and shared between products."""
+    assert catalog.get_promotion("thirty_percent") is catalog.get_promotion("thirty_percent")
+    assert catalog.get_promotion("thirty_percent").get_name() == "30% off!"
+    with pytest.raises(ValueError, match="Unknown promotion"):
+        catalog.get_promotion("free_lunch")
+
+
+# ---------- Loading ----------
+def test_load_catalog():
+    """Test the default catalog yields products of every kind with their promotions."""
+    items = list(catalog.load_catalog())
+    assert [type(prod) for prod in items] == [Product, Product, Product,
+                                              NonStockedProduct, LimitedProduct]
+    assert items[0].get_promotion() is items[3].get_promotion()
+    assert items[4].get_maximum() == 1
+
+
+def test_read_catalog(tmp_path):
+    """Test a CSV catalog is only opened once the first product is requested."""
+    path = tmp_path / "catalog.csv"
+    source = catalog.read_catalog(path)
+    path.write_text("# kind,name,price,quantity,maximum,promotion\n"
+                    "product,MacBook Air M2,1450,100,,second_half_price\n"
+                    "limited,Shipping,10,250,1,\n", encoding="utf-8")
+    items = list(source)
+    assert items[0].get_name() == "MacBook Air M2"
+    assert items[0].get_promotion().get_name() == "Second Half price!"
+    assert items[1].get_promotion() is None
+
+
+def test_store_source():
+    """Test a store materializes its catalog source on first access only."""
+    consumed = []
+
+    def source():
+        for prod in catalog.load_catalog():
+            consumed.append(prod)
+            yield prod
+
+    best_buy = Store(source=source())
+    assert not consumed
+    assert best_buy.get_total_quantity() == 1100
+    assert len(consumed) == 5
+    assert best_buy.get_list_of_products() == consumed
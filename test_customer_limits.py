@@ -0,0 +1,118 @@
+"""
+Unit tests for the CustomerLimits class and customer-limited store orders using pytest.
+"""
+
+
+import pytest
+from customer_limits import CustomerLimits
+from products import Product
+from store import Store
+
+
+DAY = 86400.0
+
+
+class FakeClock:
+    """Manually advanced clock."""
+    def __init__(self):
+        """Initialize the clock at the start of a window."""
+        self.now = 100 * DAY
+
+    def __call__(self):
+        """Return the current time."""
+        return self.now
+
+
+def make_store(**options):
+    """Return a store of one product limited to 5 units per customer per day."""
+    mac = Product("MacBook Air M2", price=1450, quantity=1000)
+    clock = FakeClock()
+    limits = CustomerLimits(clock=clock, **options)
+    limits.set_limit(mac, 5)
+    best_buy = Store([mac])
+    best_buy.set_customer_limits(limits)
+    return best_buy, mac, clock
+
+
+# ---------- Initialization ----------
+def test_init_invalid():
+    """Test invalid windows, sizes and limits raise ValueError."""
+    with pytest.raises(ValueError, match="Invalid window"):
+        CustomerLimits(window=0)
+    with pytest.raises(ValueError, match="Invalid maximum number of entries"):
+        CustomerLimits(max_entries=0)
+    with pytest.raises(ValueError, match="Invalid limit"):
+        CustomerLimits().set_limit(Product("Mac", price=1, quantity=1), -1)
+
+
+# ---------- Orders ----------
+def test_limit_across_orders(capfd):
+    """Test a customer cannot exceed the limit by splitting it over several orders."""
+    best_buy, mac, _ = make_store()
+    assert best_buy.order([(mac, 3)], customer_id="alice") == 4350.0
+    assert best_buy.order([(mac, 3)], customer_id="alice") == 0
+    assert "customer's limit" in capfd.readouterr().out
+    assert best_buy.order([(mac, 2)], customer_id="alice") == 2900.0
+    assert best_buy.order([(mac, 3)], customer_id="bob") == 4350.0
+    assert best_buy.order([(mac, 30)]) == 43500.0
+    assert mac.get_quantity() == 962
+
+
+def test_rolling_window():
+    """Test purchases count fully in their window and fade out over the next one."""
+    best_buy, mac, clock = make_store()
+    best_buy.order([(mac, 4)], customer_id="alice")
+    limits = best_buy.get_customer_limits()
+    clock.now += DAY / 2
+    assert limits.get_purchased("alice", mac) == 4
+    clock.now += DAY * 3 / 4
+    assert limits.get_purchased("alice", mac) == 3
+    assert best_buy.order([(mac, 3)], customer_id="alice") == 0
+    assert best_buy.order([(mac, 2)], customer_id="alice") == 2900.0
+    clock.now += 2 * DAY
+    assert limits.get_purchased("alice", mac) == 0
+
+
+def test_bounded_memory(capfd):
+    """Test expired counters are dropped and live ones kept beyond max_entries."""
+    best_buy, mac, clock = make_store(max_entries=2)
+    for customer_id in ("alice", "bob", "carol"):
+        best_buy.order([(mac, 5)], customer_id=customer_id)
+    limits = best_buy.get_customer_limits()
+    assert "customers are limited" in capfd.readouterr().out
+    assert len(limits) == 2
+    assert limits.get_purchased("alice", mac) == 5
+    assert limits.get_purchased("carol", mac) == 0
+    # alice's allowance is not reset by the rejected customer
+    assert best_buy.order([(mac, 1)], customer_id="alice") == 0
+
+    clock.now += 2 * DAY
+    assert best_buy.order([(mac, 5)], customer_id="carol") == 7250.0
+    assert len(limits) == 1
+    assert limits.get_purchased("carol", mac) == 5
+
+
+def test_record_keeps_live_counters():
+    """Test recording beyond max_entries never drops a counter still in the window."""
+    mac = Product("MacBook Air M2", price=1450, quantity=1000)
+    clock = FakeClock()
+    limits = CustomerLimits(clock=clock, default_limit=5, max_entries=1)
+    limits.record("alice", mac, 5)
+    limits.record("bob", mac, 1)
+    assert len(limits) == 2
+    assert limits.get_purchased("alice", mac) == 5
+    clock.now += DAY
+    limits.record("carol", mac, 1)
+    assert len(limits) == 3
+    clock.now += DAY
+    limits.record("dave", mac, 1)
+    assert len(limits) == 2
+    assert limits.get_purchased("alice", mac) == 0
+
+
+def test_unlimited_products_not_tracked():
+    """Test products without a limit are neither limited nor counted."""
+    best_buy, mac, _ = make_store()
+    best_buy.get_customer_limits().remove_limit(mac)
+    assert best_buy.order([(mac, 50)], customer_id="alice") == 72500.0
+    assert len(best_buy.get_customer_limits()) == 0
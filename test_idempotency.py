@@ -0,0 +1,147 @@
+"""
+Unit tests for the IdempotencyCache class and keyed store orders using pytest.
+"""
+
+
+import threading
+import pytest
+from idempotency import IdempotencyCache
+from products import Product
+from store import Store
+
+
+class FakeClock:
+    """Manually advanced clock."""
+    def __init__(self):
+        """Initialize the clock at zero."""
+        self.now = 0.0
+
+    def __call__(self):
+        """Return the current time."""
+        return self.now
+
+
+# ---------- Initialization ----------
+def test_init_invalid():
+    """Test invalid cache limits raise ValueError."""
+    with pytest.raises(ValueError, match="Invalid maximum number of entries"):
+        IdempotencyCache(max_entries=0)
+    with pytest.raises(ValueError, match="Invalid time to live"):
+        IdempotencyCache(ttl=0)
+
+
+# ---------- Deduplication ----------
+def test_order_with_key():
+    """Test retrying an order with the same key does not buy again."""
+    bose = Product("Bose QuietComfort Earbuds", price=250, quantity=500)
+    best_buy = Store([bose])
+    assert best_buy.order([(bose, 2)], idempotency_key="order-1") == 500.0
+    assert best_buy.order([(bose, 2)], idempotency_key="order-1") == 500.0
+    assert bose.get_quantity() == 498
+    assert best_buy.order([(bose, 2)], idempotency_key="order-2") == 500.0
+    assert bose.get_quantity() == 496
+
+
+def test_eviction():
+    """Test keys are forgotten after their time to live or beyond the size limit."""
+    clock = FakeClock()
+    cache = IdempotencyCache(max_entries=2, ttl=10, clock=clock)
+    calls = []
+    assert cache.run("a", calls.append, 1) is None
+    clock.now = 5
+    cache.run("a", calls.append, 2)
+    assert calls == [1]
+
+    clock.now = 11
+    cache.run("a", calls.append, 3)
+    assert calls == [1, 3]
+
+    cache.run("b", calls.append, 4)
+    cache.run("c", calls.append, 5)
+    assert len(cache) == 2
+    cache.run("a", calls.append, 6)
+    assert calls == [1, 3, 4, 5, 6]
+
+
+def test_running_call_is_not_evicted():
+    """Test a key whose call is still running is not evicted to make room for others."""
+    cache = IdempotencyCache(max_entries=1)
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def slow_call():
+        calls.append(1)
+        started.set()
+        release.wait()
+        return "done"
+
+    results = []
+    first = threading.Thread(target=lambda: results.append(cache.run("a", slow_call)))
+    first.start()
+    started.wait()
+    second = threading.Thread(target=lambda: results.append(cache.run("a", slow_call)))
+    try:
+        cache.run("b", calls.append, 2)
+        cache.run("c", calls.append, 3)
+        assert len(cache) == 2
+        second.start()
+    finally:
+        release.set()
+    first.join()
+    second.join()
+    assert results == ["done", "done"]
+    assert calls == [1, 2, 3]
+
+
+def test_store_cache_created_once():
+    """Test concurrent first keyed orders share one idempotency cache."""
+    bose = Product("Bose QuietComfort Earbuds", price=250, quantity=500)
+    best_buy = Store([bose])
+    barrier = threading.Barrier(8)
+    caches = []
+
+    def first_keyed_order():
+        barrier.wait()
+        caches.append(best_buy.get_idempotency_cache())
+
+    threads = [threading.Thread(target=first_keyed_order) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert all(cache is caches[0] for cache in caches)
+
+
+def test_failed_call_is_retried():
+    """Test a key whose call raised runs again on retry."""
+    cache = IdempotencyCache()
+    with pytest.raises(ZeroDivisionError):
+        cache.run("a", lambda: 1 / 0)
+    assert cache.run("a", lambda: 42) == 42
+
+
+def test_concurrent_callers():
+    """Test concurrent callers with the same key share a single call."""
+    cache = IdempotencyCache()
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def slow_call():
+        calls.append(1)
+        started.set()
+        release.wait()
+        return "done"
+
+    results = []
+    first = threading.Thread(target=lambda: results.append(cache.run("a", slow_call)))
+    first.start()
+    started.wait()
+    second = threading.Thread(target=lambda: results.append(cache.run("a", slow_call)))
+    second.start()
+    release.set()
+    first.join()
+    second.join()
+    assert results == ["done", "done"]
+    assert calls == [1]
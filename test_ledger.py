@@ -0,0 +1,74 @@
+"""
+Unit tests for the SalesLedger class using pytest.
+"""
+
+
+import csv
+import promotions
+from ledger import SalesLedger
+from products import Product, LimitedProduct
+from store import Store
+
+
+def make_store():
+    """Return a store with a ledger and its products."""
+    bose = Product("Bose QuietComfort Earbuds", price=250, quantity=500)
+    bose.set_promotion(promotions.ThirdOneFree())
+    mac = Product("MacBook Air M2", price=1450, quantity=100)
+    shipping = LimitedProduct("Shipping", price=10, quantity=250, maximum=1)
+    best_buy = Store([bose, mac, shipping])
+    best_buy.set_ledger(SalesLedger())
+    return best_buy, bose, mac, shipping
+
+
+# ---------- Aggregates ----------
+def test_record_order(capfd):
+    """Test committed lines update the running totals and rejected lines are not recorded."""
+    best_buy, bose, mac, shipping = make_store()
+    assert best_buy.order([(bose, 3), (mac, 1), (shipping, 2)]) == 1950.0
+    assert capfd.readouterr().out.strip() == ("The requested quantity is higher than "
+                                              "maximum per order")
+
+    ledger = best_buy.get_ledger()
+    assert ledger.get_line_count() == 2
+    assert ledger.get_units() == 4
+    assert ledger.get_revenue() == 1950.0
+    assert ledger.get_discount() == 250.0
+    assert ledger.get_product_totals(bose.get_id()) == {"units": 3, "revenue": 500.0,
+                                                        "discount": 250.0}
+    assert ledger.get_product_totals(shipping.get_id()) == {"units": 0, "revenue": 0.0,
+                                                            "discount": 0.0}
+    assert ledger.get_promotion_totals("Third One Free!")["discount"] == 250.0
+    assert ledger.get_promotion_totals(None)["revenue"] == 1450.0
+
+
+# ---------- Export ----------
+def test_to_columns():
+    """Test the recorded lines are exported column by column."""
+    best_buy, bose, mac, _ = make_store()
+    best_buy.order([(bose, 3), (mac, 1)])
+    assert best_buy.get_ledger().to_columns() == {
+        "product_id": [bose.get_id(), mac.get_id()], "quantity": [3, 1],
+        "list_price": [750.0, 1450.0], "charged_price": [500.0, 1450.0],
+        "promotion": ["Third One Free!", None]}
+
+
+def test_keep_lines():
+    """Test a ledger without lines still keeps the aggregates."""
+    bose = Product("Bose QuietComfort Earbuds", price=250, quantity=500)
+    ledger = SalesLedger(keep_lines=False)
+    ledger.record(bose, 2, 500.0)
+    assert ledger.get_revenue() == 500.0
+    assert ledger.to_columns()["quantity"] == []
+
+
+def test_export_csv(tmp_path):
+    """Test exporting the recorded lines to a CSV file."""
+    best_buy, bose, _, _ = make_store()
+    best_buy.order([(bose, 3)])
+    path = tmp_path / "sales.csv"
+    best_buy.get_ledger().export_csv(path)
+    with open(path, newline="", encoding="utf-8") as csv_file:
+        rows = list(csv.reader(csv_file))
+    assert rows == [["product_id", "quantity", "list_price", "charged_price", "promotion"],
+                    [str(bose.get_id()), "3", "750.0", "500.0", "Third One Free!"]]
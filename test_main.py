@@ -0,0 +1,94 @@
+"""
+Unit tests for the batch mode of the main application using pytest.
+"""
+
+
+import io
+import json
+import promotions
+from main import main, parse_order, product_record, run_batch
+from products import Product, NonStockedProduct, LimitedProduct
+from store import Store
+
+
+def make_store():
+    """Return a store with one product of each type."""
+    mac = Product("MacBook Air M2", price=1450, quantity=100)
+    mac.set_promotion(promotions.SecondHalfPrice())
+    windows = NonStockedProduct("Windows License", price=125)
+    shipping = LimitedProduct("Shipping", price=10, quantity=250, maximum=1)
+    return Store([mac, windows, shipping]), (mac, windows, shipping)
+
+
+def run(store_p, text):
+    """Run the batch commands of text and return the decoded JSON result lines."""
+    out = io.StringIO()
+    run_batch(store_p, io.StringIO(text), out)
+    return [json.loads(line) for line in out.getvalue().splitlines()]
+
+
+# ---------- Records ----------
+def test_product_record():
+    """Test product records, with no quantity for non-stocked products."""
+    _, (mac, windows, _) = make_store()
+    assert product_record(mac) == {"command": "list", "id": mac.get_id(),
+                                   "name": "MacBook Air M2", "price": 1450.0,
+                                   "quantity": 100, "promotion": "Second Half price!"}
+    assert product_record(windows)["quantity"] is None
+    assert product_record(windows)["promotion"] is None
+
+
+# ---------- Commands ----------
+def test_list_total_and_order():
+    """Test the JSON output of list, total and order commands."""
+    best_buy, (mac, windows, shipping) = make_store()
+    results = run(best_buy, f"list\ntotal\norder {mac.get_id()}:2 {shipping.get_id()}:1\n"
+                            "total\n")
+    assert [result["id"] for result in results[:3]] == [mac.get_id(), windows.get_id(),
+                                                        shipping.get_id()]
+    assert results[3] == {"command": "total", "quantity": 350}
+    assert results[4] == {"command": "order", "total": 2185.0}
+    assert results[5] == {"command": "total", "quantity": 347}
+
+
+def test_order_by_id():
+    """Test order arguments resolve product IDs to the right products."""
+    best_buy, (mac, windows, shipping) = make_store()
+    order_list = parse_order(best_buy, [f"{shipping.get_id()}:1", f"{windows.get_id()}:3",
+                                        f"{mac.get_id()}:2"])
+    assert order_list == [(shipping, 1), (windows, 3), (mac, 2)]
+    run(best_buy, f"order {mac.get_id()}:3\n")
+    assert mac.get_quantity() == 97
+    assert shipping.get_quantity() == 250
+
+
+def test_errors_per_line(capfd):
+    """Test invalid commands report an error on their line and the batch goes on."""
+    best_buy, (mac, _, shipping) = make_store()
+    results = run(best_buy, f"order 0:1\norder {mac.get_id()}:0\norder x:1\nrefund\n"
+                            f"order {shipping.get_id()}:2\ntotal\n")
+    assert [(result["command"], result.get("line")) for result in results[:4]] == [
+        ("order", 1), ("order", 2), ("order", 3), ("refund", 4)]
+    assert all("error" in result for result in results[:4])
+    assert "not found" in results[0]["error"]
+    assert results[4] == {"command": "order", "total": 0}
+    assert "maximum per order" in capfd.readouterr().err
+    assert results[5] == {"command": "total", "quantity": 350}
+
+
+def test_comments_and_quit():
+    """Test blank and '#' lines are skipped and 'quit' stops the batch."""
+    best_buy, (mac, _, _) = make_store()
+    results = run(best_buy, f"# restock check\n\n   \ntotal\nquit\norder {mac.get_id()}:1\n")
+    assert results == [{"command": "total", "quantity": 350}]
+    assert mac.get_quantity() == 100
+
+
+def test_main_batch_file(tmp_path, capsys):
+    """Test main() runs a batch file over a CSV catalog."""
+    catalog_path = tmp_path / "catalog.csv"
+    catalog_path.write_text("product,MacBook Air M2,1450,100,,\n", encoding="utf-8")
+    batch_path = tmp_path / "commands.txt"
+    batch_path.write_text("total\n", encoding="utf-8")
+    main(["--catalog", str(catalog_path), "--batch", str(batch_path)])
+    assert json.loads(capsys.readouterr().out) == {"command": "total", "quantity": 100}
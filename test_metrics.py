@@ -0,0 +1,124 @@
+"""
+Unit tests for the metrics module using pytest.
+"""
+
+
+import json
+import threading
+import pytest
+import metrics
+import promotions
+from products import Product, LimitedProduct
+from store import Store
+
+
+@pytest.fixture(name="enabled_metrics")
+def fixture_enabled_metrics():
+    """Collect metrics from a clean state for the duration of a test."""
+    metrics.reset()
+    metrics.enable()
+    yield
+    metrics.disable()
+    metrics.reset()
+
+
+def counter_value(data, name, labels=None):
+    """Return the value of a counter in a snapshot, or 0 if it was never incremented."""
+    for counter in data["counters"]:
+        if counter["name"] == name and counter["labels"] == (labels or {}):
+            return counter["value"]
+    return 0
+
+
+# ---------- Disabled ----------
+def test_disabled():
+    """Test nothing is collected while metrics are disabled."""
+    metrics.reset()
+    bose = Product("Bose QuietComfort Earbuds", price=250, quantity=500)
+    Store([bose]).order([(bose, 5)])
+    assert metrics.is_enabled() is False
+    assert metrics.snapshot() == {"counters": [], "histograms": []}
+
+
+# ---------- Counters ----------
+def test_order_counters(enabled_metrics, capfd):  # pylint: disable=unused-argument
+    """Test orders, lines, rejections and units sold are counted."""
+    bose = Product("Bose QuietComfort Earbuds", price=250, quantity=500)
+    shipping = LimitedProduct("Shipping", price=10, quantity=250, maximum=1)
+    google = Product("Google Pixel 7", price=500, quantity=250)
+    best_buy = Store([bose, shipping])
+    best_buy.order([(bose, 2), (bose, 3), (shipping, 2), (google, 1)])
+    capfd.readouterr()
+
+    data = metrics.snapshot()
+    assert counter_value(data, "store_orders_total") == 1
+    assert counter_value(data, "store_order_lines_total") == 3
+    assert counter_value(data, "store_units_sold_total", {"product_type": "Product"}) == 5
+    assert counter_value(data, "store_purchase_rejections_total",
+                         {"reason": "over_limit"}) == 1
+    assert counter_value(data, "store_purchase_rejections_total",
+                         {"reason": "not_in_store"}) == 1
+
+
+# ---------- Histograms ----------
+def test_latency_histograms(enabled_metrics):  # pylint: disable=unused-argument
+    """Test order, buy and pricing latencies are recorded."""
+    bose = Product("Bose QuietComfort Earbuds", price=250, quantity=500)
+    bose.set_promotion(promotions.ThirdOneFree())
+    Store([bose]).order([(bose, 3)])
+
+    histograms = {histogram["name"]: histogram for histogram in metrics.snapshot()["histograms"]}
+    assert histograms["store_order_seconds"]["count"] == 1
+    assert histograms["store_product_buy_seconds"]["count"] == 1
+    assert histograms["store_promotion_apply_seconds"]["labels"] == {"promotion": "ThirdOneFree"}
+    assert histograms["store_order_seconds"]["buckets"][-1] == ["+Inf", 1]
+
+
+def test_batched_values(enabled_metrics):  # pylint: disable=unused-argument
+    """Test values are kept exactly across batch aggregations and threads."""
+    def count():
+        for _ in range(metrics.PENDING_SIZE + 10):
+            metrics.inc("store_orders_total")
+            metrics.observe("store_order_seconds", 0.003)
+
+    threads = [threading.Thread(target=count) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    data = metrics.snapshot()
+    assert counter_value(data, "store_orders_total") == 4 * (metrics.PENDING_SIZE + 10)
+    assert data["histograms"][0]["count"] == 4 * (metrics.PENDING_SIZE + 10)
+
+
+def test_timed_signature(enabled_metrics):  # pylint: disable=unused-argument
+    """Test timing wrappers take the parameters, defaults and keywords of the method."""
+    bose = Product("Bose QuietComfort Earbuds", price=250, quantity=500)
+    best_buy = Store([bose])
+    assert Store.order is not Store.order.__wrapped__
+    assert best_buy.order([(bose, 1)], customer_id=None) == 250.0
+    assert best_buy.order(shopping_list=[(bose, 1)], idempotency_key="a") == 250.0
+    with pytest.raises(TypeError):
+        best_buy.order()
+    metrics.disable()
+    assert not hasattr(Store.order, "__wrapped__")
+
+
+# ---------- Export ----------
+def test_to_prometheus(enabled_metrics):  # pylint: disable=unused-argument
+    """Test the Prometheus text rendering of counters and histograms."""
+    metrics.inc("store_orders_total", amount=2)
+    metrics.observe("store_order_seconds", 0.003)
+    text = metrics.to_prometheus()
+    assert "# TYPE store_orders_total counter\nstore_orders_total 2\n" in text
+    assert 'store_order_seconds_bucket{le="0.0025"} 0\n' in text
+    assert 'store_order_seconds_bucket{le="0.005"} 1\n' in text
+    assert "store_order_seconds_count 1\n" in text
+
+
+def test_write_json(enabled_metrics, tmp_path):  # pylint: disable=unused-argument
+    """Test writing a metrics snapshot to a JSON file."""
+    metrics.inc("store_orders_total")
+    path = tmp_path / "metrics.json"
+    metrics.write_json(path)
+    assert json.loads(path.read_text(encoding="utf-8")) == metrics.snapshot()
@@ -3,7 +3,8 @@ Unit tests for the Product class using pytest.
 """
 
 import pytest
-from products import Product
+from products import Product, LimitedProduct, get_product_by_id
+from promotions import SecondHalfPrice
 
 
 # ---------- Initialization ----------
@@ -51,6 +52,18 @@ def test_init_invalid():
         Product("Bose QuietComfort Earbuds", price=250, quantity="")
 
 
+# ---------- ID ----------
+def test_get_id():
+    """Verify that every product gets a unique ID that resolves back to it."""
+    bose = Product("Bose QuietComfort Earbuds", price=250, quantity=500)
+    mac = Product("MacBook Air M2", price=1450, quantity=100)
+    assert isinstance(bose.get_id(), int)
+    assert bose.get_id() != mac.get_id()
+    assert get_product_by_id(bose.get_id()) is bose
+    assert get_product_by_id(mac.get_id()) is mac
+    assert get_product_by_id(-1) is None
+
+
 # ---------- Quantity Management ----------
 def test_get_quantity():
     """Verify that get_quantity returns the current product quantity."""
@@ -80,6 +93,69 @@ def test_set_quantity_invalid():
         t_product.set_quantity(-250)
 
 
+# ---------- Price ----------
+def test_set_price():
+    """Ensure set_price updates the price and rejects invalid prices."""
+    t_product = Product("Bose QuietComfort Earbuds", price=250, quantity=500)
+    t_product.set_price(199.5)
+    assert t_product.get_price() == 199.5
+    assert t_product.show() == "Bose QuietComfort Earbuds, Price: $199.5, Quantity: 500"
+    with pytest.raises(ValueError, match="Invalid price, please provide a real number,"
+                                         " greater than zero"):
+        t_product.set_price(-1)
+    with pytest.raises(ValueError, match="Invalid price, please provide a real number,"
+                                         " greater than zero"):
+        t_product.set_price("12a")
+
+
+def test_apply_update():
+    """Ensure apply_update sets several values at once and reactivates restocked products."""
+    t_product = Product("Bose QuietComfort Earbuds", price=250, quantity=500)
+    t_product.apply_update(quantity=0)
+    assert t_product.is_active() is False
+    t_product.apply_update(quantity=20, price=240.0)
+    assert t_product.is_active() is True
+    assert (t_product.get_quantity(), t_product.get_price()) == (20, 240.0)
+    t_product.apply_update(active=False)
+    assert t_product.is_active() is False
+    assert t_product.get_quantity() == 20
+
+
+# ---------- Low Stock Alerts ----------
+def test_low_stock_alert():
+    """Ensure subscribers are only notified when stock crosses the low-water mark."""
+    alerts = []
+    t_product = Product("Bose QuietComfort Earbuds", price=250, quantity=500)
+    t_product.set_low_stock_alert(100, [lambda prod, quantity: alerts.append(quantity)])
+    assert t_product.get_low_stock_threshold() == 100
+
+    t_product.buy(300)
+    assert not alerts
+    t_product.buy(100)
+    assert alerts == [100]
+    t_product.buy(50)
+    assert alerts == [100]
+
+    # restocking above the mark arms the alert again
+    t_product.set_quantity(200)
+    t_product.set_quantity(20)
+    assert alerts == [100, 20]
+
+    t_product.remove_low_stock_alert()
+    t_product.set_quantity(500)
+    t_product.set_quantity(0)
+    assert alerts == [100, 20]
+
+
+def test_low_stock_alert_invalid():
+    """Check that invalid low-water marks raise ValueError."""
+    t_product = Product("Bose QuietComfort Earbuds", price=250, quantity=500)
+    with pytest.raises(ValueError, match="Invalid low stock threshold"):
+        t_product.set_low_stock_alert(-1, [])
+    with pytest.raises(ValueError, match="Invalid low stock threshold"):
+        t_product.set_low_stock_alert("10a", [])
+
+
 # ---------- Active Status ----------
 def test_is_active():
     """Verify is_active reflects product status before and after quantity changes."""
@@ -106,6 +182,25 @@ def test_show():
     assert t_product.show() == "Bose QuietComfort Earbuds, Price: $250.0, Quantity: 500"
 
 
+def test_show_cache():
+    """Verify that the cached show() line is rebuilt when the product details change."""
+    t_product = Product("Bose QuietComfort Earbuds", price=250, quantity=500)
+    assert t_product.show() is t_product.show()
+
+    t_product.buy(100)
+    assert t_product.show() == "Bose QuietComfort Earbuds, Price: $250.0, Quantity: 400"
+    t_product.set_promotion(SecondHalfPrice())
+    assert t_product.show() == ("Bose QuietComfort Earbuds, Price: $250.0, Quantity: 400, "
+                                "Promotion: Second Half price!")
+    t_product.remove_promotion()
+    assert t_product.show() == "Bose QuietComfort Earbuds, Price: $250.0, Quantity: 400"
+
+    t_product = LimitedProduct("Shipping", price=10, quantity=250, maximum=1)
+    assert t_product.show() == "Shipping, Price: $10.0, Quantity: 250, Limit: 1"
+    t_product.set_maximum(2)
+    assert t_product.show() == "Shipping, Price: $10.0, Quantity: 250, Limit: 2"
+
+
 # ---------- Buy ----------
 def test_buy_valid(capfd):
     """Verify buy() decreases quantity correctly and enforces stock limits."""
@@ -135,3 +230,20 @@ def test_buy_invalid(capfd):
     t_product.buy(-250)
     assert captured.out.strip() == ("Invalid quantity, please provide a real number,"
                                     " greater or equal to zero")
+
+
+def test_get_quote():
+    """Test quoting a price uses the promotion and leaves the stock unchanged."""
+    product = Product("MacBook Air M2", price=1450, quantity=100)
+    assert product.get_quote(2) == 2900.0
+    product.set_promotion(SecondHalfPrice())
+    assert product.get_quote(2) == 2175.0
+    assert product.get_quantity() == 100
+
+
+def test_get_name_interned():
+    """Test products with equal names share one name string."""
+    first = Product("".join(["MacBook ", "Air M2"]), price=1450, quantity=100)
+    second = Product("".join(["MacBook ", "Air M2"]), price=1450, quantity=100)
+    assert first.get_name() is second.get_name()
+    assert first.get_name() is first.get_name()
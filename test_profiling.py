@@ -0,0 +1,73 @@
+"""
+Unit tests for the profiling module using pytest.
+"""
+
+
+import os
+import pytest
+import promotions
+from products import Product
+from profiling import OrderProfiler, aggregate_traces, main
+from store import Store
+
+
+def make_store():
+    """Return a store with one promoted product, and that product."""
+    bose = Product("Bose QuietComfort Earbuds", price=250, quantity=500)
+    bose.set_promotion(promotions.ThirdOneFree())
+    return Store([bose]), bose
+
+
+# ---------- Initialization ----------
+def test_init_invalid(tmp_path):
+    """Test invalid profiler settings raise ValueError."""
+    with pytest.raises(ValueError, match="Invalid profiling mode"):
+        OrderProfiler(tmp_path, mode="perf")
+    with pytest.raises(ValueError, match="Invalid sample rate"):
+        OrderProfiler(tmp_path, sample_rate=2)
+    with pytest.raises(ValueError, match="Invalid maximum number of files"):
+        OrderProfiler(tmp_path, max_files=0)
+
+
+# ---------- Sampling ----------
+def test_should_capture(tmp_path):
+    """Test orders are selected by predicate or sampling rate."""
+    profiler = OrderProfiler(tmp_path, predicate=lambda shopping_list: len(shopping_list) > 1)
+    assert profiler.should_capture([("a", 1), ("b", 1)]) is True
+    assert profiler.should_capture([("a", 1)]) is False
+    assert OrderProfiler(tmp_path, sample_rate=1).should_capture([]) is True
+    assert OrderProfiler(tmp_path).should_capture([]) is False
+
+
+# ---------- Capture ----------
+def test_capture_cprofile(tmp_path):
+    """Test a sampled order is profiled with cProfile and still processed."""
+    best_buy, bose = make_store()
+    best_buy.set_profiler(OrderProfiler(tmp_path, sample_rate=1))
+    assert best_buy.order([(bose, 3)]) == 500.0
+    assert bose.get_quantity() == 497
+    assert [name[-5:] for name in os.listdir(tmp_path)] == [".prof"]
+
+
+def test_capture_trace(tmp_path):
+    """Test a sampled order is captured as a span trace that can be aggregated."""
+    best_buy, bose = make_store()
+    best_buy.set_profiler(OrderProfiler(tmp_path, sample_rate=1, mode="trace"))
+    assert best_buy.order([(bose, 3)]) == 500.0
+    summary = aggregate_traces(tmp_path)
+    for name in ("make_compact_order_list", "has_product", "try_buy", "apply_promotion"):
+        assert summary[name]["count"] == 1
+    assert summary["try_buy"]["total_us"] >= summary["apply_promotion"]["total_us"]
+
+
+def test_rotation(tmp_path, capfd):
+    """Test only the newest max_files captures are kept, and the CLI aggregates them."""
+    best_buy, bose = make_store()
+    best_buy.set_profiler(OrderProfiler(tmp_path, sample_rate=1, mode="trace", max_files=2))
+    for _ in range(4):
+        best_buy.order([(bose, 1)])
+    assert len(os.listdir(tmp_path)) == 2
+    assert aggregate_traces(tmp_path)["try_buy"]["count"] == 2
+
+    assert main([str(tmp_path)]) == 0
+    assert "apply_promotion" in capfd.readouterr().out
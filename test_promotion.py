@@ -101,6 +101,14 @@ def test_pd_init_invalid():
                                          "please give a number between 0 and 100"):
         PercentDiscount("50a")
 
+
+def test_pd_shared_name():
+    """Test PercentDiscount instances of the same percentage share one name string."""
+    assert PercentDiscount(30).get_name() is PercentDiscount(30).get_name()
+    assert PercentDiscount(30.0).get_name() == "30.0% off!"
+    assert PercentDiscount(30).get_name() == "30% off!"
+
+
 # ---------- Get percent ----------
 def test_pd_get_percent():
     """Test PercentDiscount returns the correct percentage."""
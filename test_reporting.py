@@ -0,0 +1,93 @@
+"""
+Unit tests for the reporting module and the Store reporting API using pytest.
+"""
+
+
+import pytest
+import promotions
+from products import Product, NonStockedProduct, LimitedProduct
+from store import Store
+
+np = pytest.importorskip("numpy")
+reporting = pytest.importorskip("reporting")
+
+
+class HalfOff(promotions.Promotion):
+    """Promotion without a bulk formula, to exercise the per-product fallback."""
+    def __init__(self):
+        """Initialize 'Half off' promotion."""
+        super().__init__(name="Half off!")
+
+    def apply_promotion(self, product, quantity):
+        """Apply half-price discount to the purchase."""
+        return quantity * product.get_price() / 2
+
+
+def make_store():
+    """Return a store with one product of each type and its products."""
+    bose = Product("Bose QuietComfort Earbuds", price=250, quantity=6)
+    bose.set_promotion(promotions.ThirdOneFree())
+    windows = NonStockedProduct("Windows License", price=125)
+    shipping = LimitedProduct("Shipping", price=10, quantity=250, maximum=1)
+    shipping.set_promotion(promotions.PercentDiscount(30))
+    return Store([bose, windows, shipping]), bose, windows, shipping
+
+
+# ---------- Report ----------
+def test_inventory_report():
+    """Test stock values at list price, after promotions and by type."""
+    best_buy, _, _, _ = make_store()
+    assert best_buy.get_inventory_report() == {
+        "stock_value": 4000.0,
+        "promoted_stock_value": pytest.approx(1000.0 + 1750.0),
+        "stock_value_by_type": {"Product": 1500.0, "NonStockedProduct": 0.0,
+                                "LimitedProduct": 2500.0}}
+
+
+def test_report_follows_changes(capfd):  # pylint: disable=unused-argument
+    """Test cached columns are patched after orders and promotion changes."""
+    best_buy, bose, _, shipping = make_store()
+    assert best_buy.get_stock_value() == 4000.0
+    best_buy.order([(bose, 3), (shipping, 1)])
+    assert best_buy.get_stock_value() == 750.0 + 2490.0
+
+    bose.remove_promotion()
+    shipping.set_promotion(HalfOff())
+    assert best_buy.get_promoted_stock_value() == 750.0 + 1245.0
+
+    shipping.deactivate()
+    assert best_buy.get_stock_value(active_only=True) == 750.0
+
+    # adding a product rebuilds the columns
+    best_buy.add_product(Product("MacBook Air M2", price=1450, quantity=2))
+    assert best_buy.get_stock_value() == 750.0 + 2490.0 + 2900.0
+
+
+def test_promotion_rows_cached(capfd):  # pylint: disable=unused-argument
+    """Test the rows by promotion are regrouped only when a promotion changes."""
+    best_buy, bose, windows, shipping = make_store()
+    columns = reporting.InventoryColumns([bose, windows, shipping])
+    try:
+        rows = columns.get_promotion_rows()
+        best_buy.order([(bose, 1)])
+        columns.refresh()
+        assert columns.get_promotion_rows() is rows
+        shipping.remove_promotion()
+        columns.refresh()
+        assert columns.get_promotion_rows() is not rows
+        assert [code_rows.tolist() for code_rows in columns.get_promotion_rows()] == [[0], []]
+    finally:
+        columns.close()
+
+
+def test_bulk_matches_apply_promotion():
+    """Test each bulk promotion formula matches apply_promotion."""
+    t_product = Product("Bose QuietComfort Earbuds", price=250, quantity=500)
+    quantities = np.arange(1, 20)
+    prices = np.full(quantities.shape, t_product.get_price())
+    for promotion in (promotions.SecondHalfPrice(), promotions.ThirdOneFree(),
+                      promotions.PercentDiscount(42)):
+        expected = [promotion.apply_promotion(t_product, int(quantity)) for quantity in quantities]
+        promoted = promotion.apply_promotion_bulk(prices, quantities)
+        assert promoted.tolist() == pytest.approx(expected)
+    assert HalfOff().apply_promotion_bulk(prices, quantities) is None
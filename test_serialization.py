@@ -0,0 +1,95 @@
+"""
+Unit tests for the pickle-free product serialization using pytest.
+"""
+
+
+import pytest
+import promotions
+from products import Product, NonStockedProduct, LimitedProduct
+from serialization import PackedCatalog, attach, dumps, loads, to_shared_memory
+from store import Store
+
+
+def make_store():
+    """Return a store mixing every product type, status and promotion."""
+    half_price = promotions.SecondHalfPrice()
+    mac = Product("MacBook Air M2", price=1450, quantity=100)
+    mac.set_promotion(half_price)
+    bose = Product("Bose QuietComfort Earbuds", price=250.5, quantity=500)
+    bose.set_promotion(half_price)
+    windows = NonStockedProduct("Windows License", price=125)
+    windows.set_promotion(promotions.PercentDiscount(30))
+    shipping = LimitedProduct("Shipping ✈", price=10, quantity=250, maximum=1)
+    shipping.set_promotion(promotions.PercentDiscount(12.5))
+    best_buy = Store([mac, bose, windows, shipping,
+                      Product("MacBook Air M2", price=1250, quantity=3)])
+    best_buy.order([(best_buy.get_list_of_products()[4], 3)])
+    return best_buy
+
+
+def test_round_trip():
+    """Test products are rebuilt with their fields, status and shared promotions."""
+    best_buy = make_store()
+    restored = loads(dumps(best_buy))
+    originals = best_buy.get_list_of_products()
+    copies = restored.get_list_of_products()
+    assert [prod.show() for prod in copies] == [prod.show() for prod in originals]
+    assert [type(prod) for prod in copies] == [type(prod) for prod in originals]
+    assert [prod.is_active() for prod in copies] == [True, True, True, True, False]
+    assert copies[3].get_maximum() == 1
+    assert copies[0].get_promotion() is copies[1].get_promotion()
+    assert copies[0] is not originals[0]
+    assert restored.get_total_quantity() == best_buy.get_total_quantity()
+
+
+def test_zero_copy_columns():
+    """Test the columns are memoryviews of the packed data and tables are deduplicated."""
+    best_buy = make_store()
+    data = dumps(best_buy)
+    catalog = PackedCatalog(data)
+    assert len(catalog) == 5
+    assert catalog.prices.obj is data
+    assert list(catalog.quantities) == [100, 500, 0, 250, 0]
+    assert list(catalog.ids) == [prod.get_id() for prod in best_buy.get_list_of_products()]
+    assert len(catalog.get_promotions()) == 3
+    assert catalog.get_names() == ["MacBook Air M2", "Bose QuietComfort Earbuds",
+                                   "Windows License", "Shipping ✈"]
+    catalog.close()
+
+
+def test_id_map():
+    """Test the packed IDs map to the rebuilt products."""
+    best_buy = make_store()
+    catalog = PackedCatalog(dumps(best_buy))
+    id_map = catalog.to_id_map()
+    for prod in best_buy.get_list_of_products():
+        copy = id_map[prod.get_id()]
+        assert copy is not prod
+        assert (copy.get_name(), copy.get_price()) == (prod.get_name(), prod.get_price())
+    catalog.close()
+
+
+def test_shared_memory():
+    """Test handing products over through a shared memory block."""
+    block = to_shared_memory(make_store())
+    try:
+        attached, catalog = attach(block.name)
+        assert [prod.get_name() for prod in catalog.to_products()][:2] == [
+            "MacBook Air M2", "Bose QuietComfort Earbuds"]
+        assert catalog.prices[1] == 250.5
+        catalog.close()
+        attached.close()
+    finally:
+        block.close()
+        block.unlink()
+
+
+def test_invalid():
+    """Test unknown product types and invalid data are rejected."""
+    class Gift(Product):
+        """Product subclass unknown to the serializer."""
+
+    with pytest.raises(TypeError):
+        dumps([Gift("Gift card", price=50, quantity=1)])
+    with pytest.raises(ValueError, match="Invalid packed catalog"):
+        loads(b"\0" * 64)
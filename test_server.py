@@ -0,0 +1,131 @@
+"""
+Unit tests for the HTTP/JSON store service using pytest.
+"""
+
+
+import http.client
+import json
+import socket
+import threading
+import pytest
+import promotions
+from products import Product, NonStockedProduct, LimitedProduct
+from server import MAX_BODY_SIZE, make_server
+from store import Store
+
+
+@pytest.fixture(name="connection")
+def fixture_connection():
+    """Serve a small store on a free port and return a keep-alive connection to it."""
+    mac = Product("MacBook Air M2", price=1450, quantity=100)
+    mac.set_promotion(promotions.SecondHalfPrice())
+    windows = NonStockedProduct("Windows License", price=125)
+    shipping = LimitedProduct("Shipping", price=10, quantity=250, maximum=1)
+    server = make_server(Store([mac, windows, shipping]), port=0)
+    thread = threading.Thread(target=server.serve_forever, args=(0.01,), daemon=True)
+    thread.start()
+    connection = http.client.HTTPConnection(*server.server_address)
+    connection.products = (mac, windows, shipping)
+    yield connection
+    connection.close()
+    server.shutdown()
+    server.server_close()
+
+
+def request(connection, method, path, body=None):
+    """Send a request on the connection and return (status, decoded JSON body)."""
+    connection.request(method, path, body=None if body is None else json.dumps(body).encode())
+    response = connection.getresponse()
+    return response.status, json.loads(response.read())
+
+
+def test_list_and_total(connection):
+    """Test the streamed listing and the total on a single kept-alive connection."""
+    mac, windows, _ = connection.products
+    status, listing = request(connection, "GET", "/products")
+    assert status == 200
+    assert [record["id"] for record in listing] == [prod.get_id() for prod in
+                                                    connection.products]
+    assert listing[0] == {"id": mac.get_id(), "name": "MacBook Air M2", "price": 1450,
+                          "quantity": 100, "promotion": "Second Half price!"}
+    assert listing[1]["quantity"] is None
+    assert windows.get_quantity() == 0
+    assert request(connection, "GET", "/total") == (200, {"quantity": 350})
+
+
+def test_quote(connection):
+    """Test quoting prices lines without buying them."""
+    mac, _, shipping = connection.products
+    status, quote = request(connection, "POST", "/quote", {"lines": [
+        {"id": mac.get_id(), "quantity": 2}, {"id": shipping.get_id(), "quantity": 2}]})
+    assert status == 200
+    assert quote["lines"][0]["price"] == 2175.0
+    assert "error" in quote["lines"][1]
+    assert quote["total"] == 2175.0
+    assert mac.get_quantity() == 100
+
+
+def test_order_batch(connection):
+    """Test a batch of orders, including an invalid one and a repeated idempotency key."""
+    mac, windows, _ = connection.products
+    first = {"lines": [{"id": mac.get_id(), "quantity": 1}], "idempotency_key": "a"}
+    status, body = request(connection, "POST", "/order", {"orders": [
+        first, first, {"lines": [{"id": windows.get_id(), "quantity": 2}]},
+        {"lines": [{"id": 0, "quantity": 1}]}]})
+    assert status == 200
+    assert body["results"][:3] == [{"total": 1450.0}, {"total": 1450.0}, {"total": 250.0}]
+    assert "error" in body["results"][3]
+    assert mac.get_quantity() == 99
+
+
+def test_bad_requests(connection):
+    """Test malformed bodies and unknown endpoints get error responses."""
+    connection.request("POST", "/order", body="not json")
+    response = connection.getresponse()
+    assert response.status == 400
+    response.read()
+    assert request(connection, "GET", "/nothing")[0] == 404
+    assert request(connection, "POST", "/quote", {"lines": 3})[0] == 400
+
+
+def test_bad_order_keys(connection):
+    """Test unhashable keys and customer IDs get a per-order error, not a dropped connection."""
+    mac, _, _ = connection.products
+    line = [{"id": mac.get_id(), "quantity": 1}]
+    status, body = request(connection, "POST", "/order", {"orders": [
+        {"lines": line}, {"lines": line, "idempotency_key": [1]},
+        {"lines": line, "customer_id": {"a": 1}}]})
+    assert status == 200
+    assert body["results"][0] == {"total": 1450.0}
+    assert all("error" in result for result in body["results"][1:])
+    assert mac.get_quantity() == 99
+
+
+def test_negative_content_length(connection):
+    """Test a negative Content-Length is rejected instead of blocking the handler."""
+    connection.timeout = 2
+    connection.putrequest("POST", "/order")
+    connection.putheader("Content-Length", "-1")
+    connection.endheaders()
+    response = connection.getresponse()
+    assert response.status == 400
+    response.read()
+
+
+@pytest.mark.parametrize("content_length", [str(MAX_BODY_SIZE + 1), "abc", "-1"])
+def test_unread_body_closes_connection(connection, content_length):
+    """Test a rejected body is not parsed as more requests on the kept-alive connection."""
+    smuggled = b"GET /total HTTP/1.1\r\nHost: localhost\r\n\r\n"
+    with socket.create_connection((connection.host, connection.port), timeout=2) as sock:
+        sock.sendall(b"POST /order HTTP/1.1\r\nHost: localhost\r\n"
+                     b"Content-Length: " + content_length.encode() + b"\r\n\r\n" + smuggled)
+        received = b""
+        while True:
+            data = sock.recv(65536)
+            if not data:
+                break
+            received += data
+    assert received.startswith(b"HTTP/1.1 400")
+    assert b"Connection: close" in received
+    assert received.count(b"HTTP/1.1") == 1
+    assert b"quantity" not in received
@@ -0,0 +1,71 @@
+"""
+Unit tests for the order-replay simulator using pytest.
+"""
+
+
+import metrics
+from products import Product, NonStockedProduct, LimitedProduct
+from simulator import make_catalog, make_order_stream, replay, simulate
+from store import Store
+
+
+def describe(stream):
+    """Return the stream with products replaced by their names, for comparison."""
+    return [(arrival, [(prod.get_name(), quantity) for prod, quantity in shopping_list])
+            for arrival, shopping_list in stream]
+
+
+def test_seeded_runs_repeat():
+    """Test catalogs and order streams are the same for the same seed."""
+    first = make_catalog(200, seed=7)
+    second = make_catalog(200, seed=7)
+    assert [prod.show() for prod in first] == [prod.show() for prod in second]
+    assert {type(prod) for prod in first} == {Product, NonStockedProduct, LimitedProduct}
+    assert (describe(make_order_stream(first, 300, seed=7))
+            == describe(make_order_stream(second, 300, seed=7)))
+    assert (describe(make_order_stream(first, 300, seed=7))
+            != describe(make_order_stream(first, 300, seed=8)))
+
+
+def test_zipf_popularity():
+    """Test the most popular product is ordered far more often than the median one."""
+    catalog = make_catalog(100, seed=1)
+    counts = {}
+    for _, shopping_list in make_order_stream(catalog, 2000, seed=1, burst_factor=1):
+        for prod, _ in shopping_list:
+            counts[prod.get_name()] = counts.get(prod.get_name(), 0) + 1
+    ordered = sorted(counts.values(), reverse=True)
+    assert ordered[0] > 10 * ordered[len(ordered) // 2]
+
+
+def test_replay_report():
+    """Test the report covers every order, stockouts and the timeline."""
+    report = simulate(catalog_size=50, orders=1000, seed=3, sample_every=250)
+    assert report["orders"] == 1000
+    assert [sample["orders"] for sample in report["timeline"]] == [250, 500, 750, 1000]
+    assert report["latency_ms"]["p50"] <= report["latency_ms"]["p99"] <= report["latency_ms"]["max"]
+    assert report["peak_memory_bytes"] > report["start_memory_bytes"] > 0
+    assert report["stockouts"] <= report["rejected_lines"]
+
+
+def test_replay_stockouts(capfd):
+    """Test stockouts are counted and purchase messages are kept off stdout."""
+    mac = Product("MacBook Air M2", price=1450, quantity=3)
+    stream = [(0.1, [(mac, 2)]), (0.2, [(mac, 2)]), (0.3, [(mac, 1)])]
+    report = replay(Store([mac]), stream, trace_memory=False)
+    assert report["revenue"] == 4350.0
+    assert report["stockouts"] == 1
+    assert report["rejected_lines"] == 1
+    assert not metrics.is_enabled()
+    assert report["sold_out_products"] == 1
+    assert report["peak_memory_bytes"] == 0
+    assert capfd.readouterr().out == ""
+
+
+def test_replay_memory_excludes_latencies():
+    """Test the memory figures leave out the simulator's own latency buffer."""
+    catalog = make_catalog(20, seed=1)
+    stream = list(make_order_stream(catalog, 20000, seed=1))
+    report = replay(Store(catalog), stream, sample_every=5000)
+    growth = report["timeline"][-1]["memory_bytes"] - report["timeline"][0]["memory_bytes"]
+    assert growth < 15000 * 8
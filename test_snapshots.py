@@ -0,0 +1,77 @@
+"""
+Unit tests for the snapshots module and Store.snapshot() using pytest.
+"""
+
+
+import pytest
+import promotions
+from products import Product
+from snapshots import PersistentVector
+from store import Store
+
+
+# ---------- Persistent Vector ----------
+@pytest.mark.parametrize("size", [0, 1, 31, 32, 33, 1024, 1056, 1057, 40000])
+def test_from_iterable(size):
+    """Test vectors built in bulk hold their items in order."""
+    vector = PersistentVector.from_iterable(range(size))
+    assert len(vector) == size
+    assert list(vector) == list(range(size))
+    if size:
+        assert vector[size - 1] == size - 1
+        assert vector[-1] == size - 1
+
+
+def test_append_and_set():
+    """Test append and set return new versions and leave the old ones unchanged."""
+    versions = [PersistentVector()]
+    for value in range(2000):
+        versions.append(versions[-1].append(value))
+    assert list(versions[-1]) == list(range(2000))
+    assert list(versions[1057]) == list(range(1057))
+
+    changed = versions[-1].set(5, "five").set(1999, "last")
+    assert changed[5] == "five"
+    assert changed[1999] == "last"
+    assert versions[-1][5] == 5
+
+    # appending after a bulk build keeps the structure consistent
+    vector = PersistentVector.from_iterable(range(1056))
+    for value in range(1056, 1200):
+        vector = vector.append(value)
+    assert list(vector) == list(range(1200))
+
+    with pytest.raises(IndexError):
+        versions[3][3]  # pylint: disable=expression-not-assigned
+    with pytest.raises(IndexError):
+        versions[3].set(3, None)
+
+
+# ---------- Store Snapshots ----------
+def test_snapshot_is_consistent(capfd):  # pylint: disable=unused-argument
+    """Test a snapshot keeps its point-in-time view while the store changes."""
+    bose = Product("Bose QuietComfort Earbuds", price=250, quantity=5)
+    mac = Product("MacBook Air M2", price=1450, quantity=100)
+    best_buy = Store([bose, mac])
+    before = best_buy.snapshot()
+    assert best_buy.snapshot().get_version() == before.get_version()
+
+    best_buy.order([(bose, 5), (mac, 10)])
+    mac.set_promotion(promotions.PercentDiscount(30))
+    google = Product("Google Pixel 7", price=500, quantity=250)
+    best_buy.add_product(google)
+    after = best_buy.snapshot()
+
+    assert after.get_version() > before.get_version()
+    assert [record.quantity for record in before] == [5, 100]
+    assert before.get_total_quantity() == 105
+    assert [record.product for record in before.get_all_products()] == [bose, mac]
+
+    assert [record.quantity for record in after] == [0, 90, 250]
+    assert after[1].promotion == "30% off!"
+    assert [record.product for record in after.get_all_products()] == [mac, google]
+    assert after.get_total_quantity() == best_buy.get_total_quantity()
+
+    best_buy.remove_product(bose)
+    assert [record.product for record in best_buy.snapshot()] == [mac, google]
+    assert len(after) == 3
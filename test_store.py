@@ -3,10 +3,12 @@ Unit tests for the Store class using pytest.
 """
 
 
+import io
 import pytest
 import promotions
-from store import Store, make_compact_order_list
-from products import Product
+import store
+from store import Store, make_compact_order_list, render_listing
+from products import Product, NonStockedProduct
 
 
 # ---------- Initialization ----------
@@ -259,3 +261,200 @@ def test_make_compact_order_list_invalid(capfd):
     assert make_compact_order_list(check_list) == []
     captured = capfd.readouterr()
     assert captured.out.strip() == "Please provide a list of tuples of type (product, quantity)"
+
+
+# ---------- Pagination ----------
+def test_get_products_page():
+    """Test paging through active products with a cursor."""
+    items = [Product(f"Item {index}", price=10, quantity=index + 1) for index in range(5)]
+    best_buy = Store(items)
+    items[2].deactivate()
+
+    page, cursor = best_buy.get_products_page(page_size=2)
+    assert page == [items[0], items[1]]
+    page, cursor = best_buy.get_products_page(cursor, page_size=2)
+    assert page == [items[3], items[4]]
+    assert cursor is None
+
+    # the cursor stays valid when products are added after it was issued
+    page, cursor = best_buy.get_products_page(page_size=2)
+    extra = Product("Extra", price=10, quantity=1)
+    best_buy.add_product(extra)
+    page, cursor = best_buy.get_products_page(cursor, page_size=3)
+    assert page == [items[3], items[4], extra]
+    assert cursor is None
+
+    # filter with a predicate
+    page, cursor = best_buy.get_products_page(page_size=10,
+                                              predicate=lambda prod: prod.get_quantity() > 4)
+    assert page == [items[4]]
+    assert cursor is None
+
+
+def test_get_products_page_invalid():
+    """Test paging with invalid page sizes or cursors raises ValueError."""
+    best_buy = Store([Product("MacBook Air M2", price=1450, quantity=100)])
+    with pytest.raises(ValueError, match="Invalid page size"):
+        best_buy.get_products_page(page_size=0)
+    with pytest.raises(ValueError, match="Invalid cursor"):
+        best_buy.get_products_page(cursor=-1)
+
+
+def test_render_listing():
+    """Test rendering a numbered listing in a single write."""
+    bose = Product("Bose QuietComfort Earbuds", price=250, quantity=500)
+    mac = Product("MacBook Air M2", price=1450, quantity=100)
+    stream = io.StringIO()
+    render_listing([(3, bose), (4, mac)], stream)
+    assert stream.getvalue() == ("3. Bose QuietComfort Earbuds, Price: $250.0, Quantity: 500\n"
+                                 "4. MacBook Air M2, Price: $1450.0, Quantity: 100\n")
+
+
+# ---------- Product IDs ----------
+def test_get_product():
+    """Test resolving products by their IDs."""
+    bose = Product("Bose QuietComfort Earbuds", price=250, quantity=500)
+    mac = Product("MacBook Air M2", price=1450, quantity=100)
+    best_buy = Store([bose, mac])
+    assert best_buy.get_product(mac.get_id()) is mac
+    assert best_buy.has_product(mac) is True
+
+    # IDs do not shift when another product is removed
+    best_buy.remove_product(bose)
+    assert best_buy.get_product(mac.get_id()) is mac
+    assert best_buy.get_product(bose.get_id()) is None
+    assert best_buy.has_product(bose) is False
+    assert best_buy.has_product("MacBook Air M2") is False
+
+
+# ---------- Low Stock Alerts ----------
+def test_set_low_stock_alerts():
+    """Test registering low-water marks for the whole catalog or per product ID."""
+    alerts = []
+    bose = Product("Bose QuietComfort Earbuds", price=250, quantity=500)
+    mac = Product("MacBook Air M2", price=1450, quantity=100)
+    windows = NonStockedProduct("Windows License", price=125)
+    best_buy = Store([bose, mac, windows])
+
+    best_buy.set_low_stock_alerts(10, [lambda prod, quantity: alerts.append(prod)])
+    assert bose.get_low_stock_threshold() == 10
+    assert windows.get_low_stock_threshold() is None
+
+    best_buy.set_low_stock_alerts({mac.get_id(): 95}, [lambda prod, quantity: alerts.append(prod)])
+    best_buy.order([(mac, 5), (bose, 5), (windows, 5)])
+    assert alerts == [mac]
+
+    with pytest.raises(ValueError, match="not found in inventory"):
+        best_buy.set_low_stock_alerts({-1: 5}, [])
+
+
+def test_set_low_stock_alerts_all_or_nothing():
+    """Test an invalid mapping entry leaves every low-water mark unchanged."""
+    bose = Product("Bose QuietComfort Earbuds", price=250, quantity=500)
+    mac = Product("MacBook Air M2", price=1450, quantity=100)
+    windows = NonStockedProduct("Windows License", price=125)
+    best_buy = Store([bose, mac, windows])
+
+    with pytest.raises(ValueError, match="not found in inventory"):
+        best_buy.set_low_stock_alerts({bose.get_id(): 5, -1: 5}, [])
+    with pytest.raises(ValueError, match="low stock threshold"):
+        best_buy.set_low_stock_alerts({bose.get_id(): 5, mac.get_id(): -1}, [])
+    with pytest.raises(ValueError, match="not stocked"):
+        best_buy.set_low_stock_alerts({bose.get_id(): 5, windows.get_id(): 5}, [])
+    assert bose.get_low_stock_threshold() is None
+    assert windows.get_low_stock_threshold() is None
+
+
+# ---------- Bulk Updates ----------
+def test_apply_updates():
+    """Test bulk restock and price updates, including reactivation of sold-out products."""
+    bose = Product("Bose QuietComfort Earbuds", price=250, quantity=500)
+    mac = Product("MacBook Air M2", price=1450, quantity=100)
+    windows = NonStockedProduct("Windows License", price=125)
+    best_buy = Store([bose, mac, windows])
+    mac.set_quantity(0)
+    assert best_buy.get_all_products() == [bose, windows]
+
+    assert best_buy.apply_updates([(bose.get_id(), None, 199.0, None),
+                                   (mac.get_id(), 10, None, None),
+                                   (windows.get_id(), 50, 99.5, None)]) == 3
+    assert bose.get_price() == 199.0
+    assert bose.get_quantity() == 500
+    assert best_buy.get_all_products() == [bose, mac, windows]
+    assert windows.get_quantity() == 0
+    assert windows.get_price() == 99.5
+
+
+def test_apply_updates_invalid():
+    """Test an invalid record rejects the whole batch."""
+    bose = Product("Bose QuietComfort Earbuds", price=250, quantity=500)
+    best_buy = Store([bose])
+    for record, message in [((-1, 5, None, None), "not found in inventory"),
+                            ((bose.get_id(), -5, None, None), "invalid quantity"),
+                            ((bose.get_id(), "5", None, None), "invalid quantity"),
+                            ((bose.get_id(), None, float("nan"), None), "invalid price"),
+                            ((bose.get_id(), None, None, 1), "invalid active flag")]:
+        with pytest.raises(ValueError, match=message):
+            best_buy.apply_updates([(bose.get_id(), 1, 1.0, None), record])
+        assert bose.get_quantity() == 500
+        assert bose.get_price() == 250.0
+
+
+# ---------- Tombstones ----------
+def test_sold_out_tombstone():
+    """Test sold-out products stay in place as inactive tombstones and can be revived."""
+    bose = Product("Bose QuietComfort Earbuds", price=250, quantity=5)
+    mac = Product("MacBook Air M2", price=1450, quantity=100)
+    best_buy = Store([bose, mac])
+    best_buy.order([(bose, 5)])
+    assert best_buy.get_list_of_products() == [bose, mac]
+    assert best_buy.get_all_products() == [mac]
+    assert best_buy.get_tombstone_count() == 1
+
+    best_buy.apply_updates([(bose.get_id(), 10, None, None)])
+    assert best_buy.get_all_products() == [bose, mac]
+    assert best_buy.get_tombstone_count() == 0
+
+
+def test_tombstone_count_per_product():
+    """Test a sold-out product counts once, whichever path zeroed its stock."""
+    bose = Product("Bose QuietComfort Earbuds", price=250, quantity=5)
+    mac = Product("MacBook Air M2", price=1450, quantity=100)
+    best_buy = Store([bose, mac])
+    best_buy.order([(bose, 5)])
+    best_buy.order([(bose, 0)])
+    best_buy.order([(bose, 0)])
+    assert best_buy.get_tombstone_count() == 1
+
+    best_buy.apply_updates([(mac.get_id(), 0, None, None)])
+    assert best_buy.get_tombstone_count() == 2
+    assert best_buy.get_sold_out_count() == 2
+
+    best_buy.apply_updates([(mac.get_id(), 3, None, None)])
+    best_buy.apply_updates([(mac.get_id(), 4, None, None)])
+    assert best_buy.get_tombstone_count() == 1
+
+    best_buy.remove_product(bose)
+    assert best_buy.get_tombstone_count() == 0
+
+
+def test_compact(monkeypatch):
+    """Test tombstones are compacted away once they dominate and revived on restock."""
+    monkeypatch.setattr(store, "COMPACT_MIN_SIZE", 4)
+    items = [Product(f"Item {index}", price=10, quantity=1) for index in range(4)]
+    best_buy = Store(items)
+    best_buy.order([(items[0], 1), (items[1], 1)])
+    assert len(best_buy.get_list_of_products()) == 4
+
+    # the third sold-out product tips the ratio over one half
+    best_buy.order([(items[2], 1)])
+    assert best_buy.get_list_of_products() == [items[3]]
+    assert best_buy.get_product(items[0].get_id()) is items[0]
+    assert best_buy.get_total_quantity() == 1
+
+    best_buy.apply_updates([(items[1].get_id(), 3, None, None)])
+    assert best_buy.get_list_of_products() == [items[3], items[1]]
+    assert best_buy.get_total_quantity() == 4
+
+    best_buy.remove_product(items[0])
+    assert best_buy.get_product(items[0].get_id()) is None
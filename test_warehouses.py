@@ -0,0 +1,118 @@
+"""
+Unit tests for the FulfillmentRouter class and location-stocked store orders using pytest.
+"""
+
+
+import pytest
+from products import Product, NonStockedProduct, LimitedProduct
+from store import Store
+from warehouses import FulfillmentRouter
+
+
+def make_store(prod, subscribers=()):
+    """Return a store with a router over three warehouses of increasing cost."""
+    best_buy = Store([prod])
+    best_buy.set_router(FulfillmentRouter({"berlin": 1, "hamburg": 2, "munich": 3},
+                                          subscribers=subscribers))
+    return best_buy
+
+
+def test_set_stock():
+    """Test the product quantity is the total over its locations."""
+    mac = Product("MacBook Air M2", price=1450, quantity=100)
+    best_buy = make_store(mac)
+    best_buy.set_location_stock(mac.get_id(), "munich", 5)
+    assert mac.get_quantity() == 5
+    best_buy.set_location_stock(mac.get_id(), "berlin", 3)
+    best_buy.set_location_stock(mac.get_id(), "munich", 4)
+    assert mac.get_quantity() == 7
+    assert best_buy.get_total_quantity() == 7
+    assert best_buy.get_router().get_locations(mac) == {"munich": 4, "berlin": 3}
+
+    with pytest.raises(ValueError):
+        best_buy.set_location_stock(mac.get_id(), "berlin", -1)
+    with pytest.raises(ValueError):
+        best_buy.set_location_stock(0, "berlin", 1)
+    with pytest.raises(TypeError):
+        best_buy.get_router().set_stock(NonStockedProduct("Windows License", price=125),
+                                        "berlin", 1)
+
+
+def test_order_split_by_cost():
+    """Test an order line is taken from the cheapest locations first."""
+    mac = Product("MacBook Air M2", price=1450, quantity=0)
+    allocations = []
+    best_buy = make_store(mac, [lambda prod, allocation: allocations.append(allocation)])
+    for location, quantity in (("munich", 10), ("berlin", 2), ("hamburg", 3)):
+        best_buy.set_location_stock(mac.get_id(), location, quantity)
+
+    assert best_buy.order([(mac, 4)]) == 5800.0
+    assert allocations == [[("berlin", 2), ("hamburg", 2)]]
+    assert best_buy.order([(mac, 6)]) == 8700.0
+    assert allocations[1] == [("hamburg", 1), ("munich", 5)]
+    assert mac.get_quantity() == 5
+
+    best_buy.set_location_stock(mac.get_id(), "berlin", 1)
+    best_buy.order([(mac, 2)])
+    assert allocations[2] == [("berlin", 1), ("munich", 1)]
+    assert best_buy.get_router().get_locations(mac) == {"munich": 4, "berlin": 0,
+                                                       "hamburg": 0}
+
+
+def test_sold_out_and_limits(capfd):
+    """Test stock and per-order limits apply to the total over the locations."""
+    shipping = LimitedProduct("Shipping", price=10, quantity=0, maximum=3)
+    best_buy = make_store(shipping)
+    best_buy.set_location_stock(shipping.get_id(), "berlin", 2)
+    best_buy.set_location_stock(shipping.get_id(), "munich", 2)
+    assert shipping.is_active()
+    assert best_buy.order([(shipping, 4)]) == 0
+    assert "maximum per order" in capfd.readouterr().out
+    assert best_buy.order([(shipping, 3)]) == 30.0
+    assert best_buy.order([(shipping, 1)]) == 10.0
+    assert not shipping.is_active()
+    assert best_buy.get_tombstone_count() == 1
+
+    best_buy.set_location_stock(shipping.get_id(), "hamburg", 5)
+    assert shipping.is_active()
+    assert best_buy.get_tombstone_count() == 0
+    assert best_buy.get_router().get_location_quantity(shipping, "hamburg") == 5
+
+
+def test_order_beyond_locations_is_rejected(capfd):
+    """Test a line the locations cannot cover is rejected before any stock is taken."""
+    mac = Product("MacBook Air M2", price=10, quantity=0)
+    best_buy = make_store(mac)
+    best_buy.set_location_stock(mac.get_id(), "berlin", 3)
+    best_buy.set_location_stock(mac.get_id(), "munich", 3)
+    mac.set_quantity(20)
+    assert best_buy.order([(mac, 15)]) == 0
+    assert "stock of the product's locations" in capfd.readouterr().out
+    assert mac.get_quantity() == 20
+    assert best_buy.get_router().get_locations(mac) == {"berlin": 3, "munich": 3}
+    assert best_buy.order([(mac, 6)]) == 60.0
+
+
+def test_restocked_location_is_queued_once():
+    """Test a location emptied and restocked again is not queued twice."""
+    mac = Product("MacBook Air M2", price=10, quantity=0)
+    best_buy = make_store(mac)
+    router = best_buy.get_router()
+    for quantity in (3, 0, 2, 0, 4):
+        best_buy.set_location_stock(mac.get_id(), "berlin", quantity)
+    assert len(router._heaps[mac.get_id()]) == 1  # pylint: disable=protected-access
+    assert best_buy.order([(mac, 4)]) == 40.0
+    best_buy.set_location_stock(mac.get_id(), "berlin", 1)
+    assert len(router._heaps[mac.get_id()]) == 1  # pylint: disable=protected-access
+
+
+def test_quantity_updates_of_routed_products():
+    """Test bulk quantity updates cannot bypass the locations of a routed product."""
+    mac = Product("MacBook Air M2", price=10, quantity=0)
+    best_buy = make_store(mac)
+    best_buy.set_location_stock(mac.get_id(), "berlin", 3)
+    best_buy.set_location_stock(mac.get_id(), "munich", 3)
+    with pytest.raises(ValueError, match="stocked by location"):
+        best_buy.apply_updates([(mac.get_id(), 20, None, None)])
+    assert mac.get_quantity() == 6
+    assert best_buy.apply_updates([(mac.get_id(), None, 12, None)]) == 1
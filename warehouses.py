@@ -0,0 +1,125 @@
+"""
+Multi-warehouse stock and fulfillment routing.
+
+A FulfillmentRouter holds the stock of products by location. The quantity of
+a product stocked by location is always the sum over its locations, so store
+totals, per-order limits and purchase checks keep working on the product
+itself; the router only decides which locations a bought quantity is taken
+from. The stock of such products is set through the router (or
+Store.set_location_stock()) rather than Product.set_quantity().
+
+Each product has a heap of its stocked locations ordered by the cost policy,
+so the cheapest location is found in O(log L) and a line is split across as
+few of the cheapest locations as its quantity needs. Stores check a line with
+get_purchase_error() before buying it, so a line is only sold if its
+locations can cover it.
+"""
+
+
+import heapq
+import itertools
+import products
+
+
+LOCATIONS_SHORT = ("locations_short",
+                   "The requested quantity is higher than the stock of the product's locations")
+
+
+class FulfillmentRouter:
+    """Per-location stock of products, split across locations by cost when bought."""
+
+    def __init__(self, costs=None, cost_policy=None, subscribers=()):
+        """
+        Initialize a router. The cost of taking units of a product from a location is
+        cost_policy(location, product) if given, else costs[location] (0 if missing).
+        Costs are evaluated when a location enters the heap of its product, that is when
+        it is stocked while not already queued there. Each subscriber is called
+        with (product, [(location, quantity), ...]) for every fulfilled order line.
+        """
+        self._costs = dict(costs or {})
+        self._cost_policy = cost_policy
+        self._subscribers = tuple(subscribers)
+        self._stock = {}
+        self._totals = {}
+        self._heaps = {}
+        # locations currently in the heap of each product, emptied ones included
+        self._queued = {}
+        self._sequence = itertools.count()
+
+    def get_cost(self, location, prod):
+        """Return the cost of taking units of the product from the location."""
+        if self._cost_policy is not None:
+            return self._cost_policy(location, prod)
+        return self._costs.get(location, 0)
+
+    def has_locations(self, prod):
+        """Return True if the product is stocked by location."""
+        return prod.get_id() in self._stock
+
+    def get_locations(self, prod):
+        """Return {location: quantity} of the product."""
+        return dict(self._stock.get(prod.get_id(), {}))
+
+    def get_location_quantity(self, prod, location):
+        """Return the quantity of the product at the location."""
+        return self._stock.get(prod.get_id(), {}).get(location, 0)
+
+    def get_purchase_error(self, prod, quantity):
+        """Return LOCATIONS_SHORT if the product's locations cannot cover quantity, else None."""
+        total = self._totals.get(prod.get_id())
+        if total is not None and total < quantity:
+            return LOCATIONS_SHORT
+        return None
+
+    def set_stock(self, prod, location, quantity):
+        """
+        Set the quantity of the product at the location, and the product's quantity
+        to the total over its locations.
+        """
+        if isinstance(prod, products.NonStockedProduct):
+            raise TypeError("Non-stocked products cannot be stocked by location")
+        if isinstance(quantity, bool) or not isinstance(quantity, int) or quantity < 0:
+            raise ValueError("Invalid quantity, please provide a real number, "
+                             "greater or equal to zero")
+        # stock held before the first location replaces the product's own quantity
+        total = prod.get_quantity() if prod.get_id() in self._stock else 0
+        stock = self._stock.setdefault(prod.get_id(), {})
+        heap = self._heaps.setdefault(prod.get_id(), [])
+        queued = self._queued.setdefault(prod.get_id(), set())
+        previous = stock.get(location, 0)
+        stock[location] = quantity
+        if quantity > 0 and location not in queued:
+            # a location with stock is always in the heap; emptied ones are popped lazily
+            heapq.heappush(heap, (self.get_cost(location, prod), next(self._sequence), location))
+            queued.add(location)
+        self._totals[prod.get_id()] = total - previous + quantity
+        prod.apply_update(quantity=total - previous + quantity)
+
+    def fulfill(self, prod, quantity):
+        """
+        Take quantity units of an already bought product from its cheapest locations
+        and return the [(location, quantity), ...] allocation.
+        """
+        stock = self._stock[prod.get_id()]
+        heap = self._heaps[prod.get_id()]
+        queued = self._queued[prod.get_id()]
+        allocation = []
+        remaining = quantity
+        while remaining > 0 and heap:
+            location = heap[0][2]
+            available = stock[location]
+            taken = min(available, remaining)
+            if taken:
+                stock[location] = available - taken
+                allocation.append((location, taken))
+                remaining -= taken
+            if taken == available:
+                queued.discard(heapq.heappop(heap)[2])
+        self._totals[prod.get_id()] -= quantity - remaining
+        if remaining > 0:
+            raise ValueError(f"Invalid stock for product {prod.get_id()}: its locations are "
+                             f"{remaining} unit(s) short of the quantity sold; set its stock "
+                             f"through the router, not the product")
+        for subscriber in self._subscribers:
+            subscriber(prod, allocation)
+        return allocation